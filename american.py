@@ -0,0 +1,371 @@
+# === Import Libraries ===
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import NamedTuple
+import jax
+import jax.numpy as jnp
+import numpy as np
+from jax import lax
+from jax.scipy.stats import norm
+from pricing import (IV_CONVERGED, IV_INVALID_INPUT, IV_LOW_VEGA, IV_MAX_ITERATIONS, ImpliedVolatilityResult,
+                     blackScholesCallPut, blackScholesChain, callBucketed, impliedVolatilityBatch, pricingFills,
+                     solverFills)
+from metrics import metrics
+
+# === Binomial Lattice ===
+# Every contract gets its own lattice, all stepped backwards together, so a whole
+# expiration (or a grid of them) prices in one compiled call. Leisen-Reimer trees
+# converge at O(1/n^2) for odd step counts; CRR is kept for comparison.
+def peizerPratt(z, n):
+    return 0.5 + jnp.sign(z) * 0.5 * jnp.sqrt(1 - jnp.exp(-(z / (n + 1 / 3 + 0.1 / (n + 1)))**2 * (n + 1 / 6)))
+
+@partial(jax.jit, static_argnames=("steps", "leisenReimer", "earlyExercise"))
+def binomialPrice(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0,
+                  steps: int = 201, leisenReimer: bool = True, earlyExercise: bool = True):
+    S, K, T, riskFreeRate, sigma, isCall, dividendYield = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float),
+        jnp.asarray(isCall, dtype=bool),
+        jnp.asarray(dividendYield, dtype=float)
+    )
+    live = (T > 0) & (sigma > 0)
+    safeT = jnp.where(live, T, 1.0)
+    safeSigma = jnp.where(live, sigma, 1.0)
+    dt = safeT / steps
+    growth = jnp.exp((riskFreeRate - dividendYield) * dt)
+
+    up = jnp.exp(safeSigma * jnp.sqrt(dt))
+    down = 1 / up
+    p = (growth - down) / (up - down)
+    if leisenReimer:
+        sigmaRootT = safeSigma * jnp.sqrt(safeT)
+        d1 = (jnp.log(S / K) + (riskFreeRate - dividendYield + 0.5 * safeSigma**2) * safeT) / sigmaRootT
+        leisenReimerP = peizerPratt(d1 - sigmaRootT, steps)
+        leisenReimerUp = growth * peizerPratt(d1, steps) / leisenReimerP
+        leisenReimerDown = (growth - leisenReimerP * leisenReimerUp) / (1 - leisenReimerP)
+
+        # Far from the money at low vol the Peizer-Pratt probabilities saturate at 0 or 1
+        # and the tree degenerates, so those contracts keep the CRR tree
+        usable = (leisenReimerP > 1e-6) & (leisenReimerP < 1 - 1e-6) & (leisenReimerDown > 0) & jnp.isfinite(leisenReimerUp)
+        up = jnp.where(usable, leisenReimerUp, up)
+        down = jnp.where(usable, leisenReimerDown, down)
+        p = jnp.where(usable, leisenReimerP, p)
+
+    discount = jnp.exp(-riskFreeRate * dt)
+    nodes = jnp.arange(steps + 1)
+    logS, logUp, logDown = (x[..., jnp.newaxis] for x in (jnp.log(S), jnp.log(up), jnp.log(down)))
+    strike, call = K[..., jnp.newaxis], isCall[..., jnp.newaxis]
+
+    def intrinsic(level):
+        spot = jnp.exp(logS + nodes * logUp + (level - nodes) * logDown)
+        return jnp.where(call, jnp.maximum(spot - strike, 0.0), jnp.maximum(strike - spot, 0.0))
+
+    def stepBack(i, values):
+        level = steps - 1 - i
+        continuation = discount[..., jnp.newaxis] * (p[..., jnp.newaxis] * values[..., 1:]
+                                                     + (1 - p[..., jnp.newaxis]) * values[..., :-1])
+        continuation = jnp.concatenate([continuation, jnp.zeros_like(values[..., :1])], axis=-1)
+        if earlyExercise:
+            continuation = jnp.maximum(continuation, intrinsic(level))
+        return jnp.where(nodes <= level, continuation, 0.0)
+
+    values = lax.fori_loop(0, steps, stepBack, intrinsic(steps))
+    expired = jnp.where(isCall, jnp.maximum(S - K, 0.0), jnp.maximum(K - S, 0.0))
+    return jnp.where(live, values[..., 0], expired)
+
+# === Barone-Adesi-Whaley Approximation ===
+# Quadratic approximation of the early-exercise premium; the critical spot price is
+# found with a fixed number of Newton steps so every contract runs the same program.
+@jax.jit
+def baroneAdesiWhaley(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0):
+    S, K, T, riskFreeRate, sigma, isCall, dividendYield = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float),
+        jnp.asarray(isCall, dtype=bool),
+        jnp.asarray(dividendYield, dtype=float)
+    )
+    live = (T > 0) & (sigma > 0)
+    safeT = jnp.where(live, T, 1.0)
+    safeSigma = jnp.where(live, sigma, 1.0)
+    carry = riskFreeRate - dividendYield
+    sigmaRootT = safeSigma * jnp.sqrt(safeT)
+
+    def european(spot):
+        callValue, putValue = blackScholesCallPut(spot * jnp.exp(-dividendYield * safeT), K, safeT, riskFreeRate, safeSigma)
+        return jnp.where(isCall, callValue, putValue)
+
+    def carryDelta(spot):
+        d1 = (jnp.log(spot / K) + (carry + 0.5 * safeSigma**2) * safeT) / sigmaRootT
+        return jnp.exp((carry - riskFreeRate) * safeT) * jnp.where(isCall, norm.cdf(d1), -norm.cdf(-d1))
+
+    # Early exercise only pays for calls with a dividend yield and for puts with a positive rate
+    exercisable = live & jnp.where(isCall, dividendYield > 0, riskFreeRate > 0)
+    safeRate = jnp.where(riskFreeRate > 0, riskFreeRate, 1e-8)
+    N = 2 * carry / safeSigma**2
+    M = 2 * safeRate / safeSigma**2
+    root = jnp.sqrt((N - 1)**2 + 4 * M / (1 - jnp.exp(-safeRate * safeT)))
+    q = jnp.where(isCall, (-(N - 1) + root) / 2, (-(N - 1) - root) / 2)
+    rootInfinite = jnp.sqrt((N - 1)**2 + 4 * M)
+    qInfinite = jnp.where(isCall, (-(N - 1) + rootInfinite) / 2, (-(N - 1) - rootInfinite) / 2)
+
+    # Seeds from Barone-Adesi & Whaley (1987)
+    criticalInfinite = K / (1 - 1 / qInfinite)
+    seed = jnp.where(
+        isCall,
+        K + (criticalInfinite - K) * (1 - jnp.exp(-(carry * safeT + 2 * sigmaRootT) * K / (criticalInfinite - K))),
+        criticalInfinite + (K - criticalInfinite) * jnp.exp((carry * safeT - 2 * sigmaRootT) * K / (K - criticalInfinite))
+    )
+    seed = jnp.where(exercisable, seed, K)
+    sign = jnp.where(isCall, 1.0, -1.0)
+
+    def boundaryGap(spot):
+        # Zero where exercising equals holding: sign * (S - K) = V(S) + sign * (1 - sign * delta) * S / q
+        return sign * (spot - K) - european(spot) - sign * (1 - sign * carryDelta(spot)) * spot / q
+
+    def newtonStep(_, spot):
+        gap, slope = jax.jvp(boundaryGap, (spot,), (jnp.ones_like(spot),))
+        nextSpot = spot - gap / jnp.where(jnp.abs(slope) > 1e-10, slope, 1e-10)
+        return jnp.where(exercisable, jnp.clip(nextSpot, 1e-6 * K, 1e3 * K), spot)
+
+    critical = lax.fori_loop(0, 16, newtonStep, seed)
+    A = sign * (critical / q) * (1 - sign * carryDelta(critical))
+    holding = european(S) + A * (S / critical)**q
+    exercised = jnp.where(isCall, S >= critical, S <= critical)
+    american = jnp.where(exercised, sign * (S - K), holding)
+
+    expired = jnp.where(isCall, jnp.maximum(S - K, 0.0), jnp.maximum(K - S, 0.0))
+    return jnp.where(live, jnp.where(exercisable, american, european(S)), expired)
+
+# === Solver Models ===
+# Hashable, so they can be passed to impliedVolatilityBatch as its static pricingModel.
+class BinomialModel(NamedTuple):
+    steps: int = 201
+    leisenReimer: bool = True
+    dividendYield: float = 0.0
+
+    def __call__(self, S, K, T, riskFreeRate, sigma, isCall):
+        return binomialPrice(S, K, T, riskFreeRate, sigma, isCall, self.dividendYield,
+                             steps=self.steps, leisenReimer=self.leisenReimer)
+
+class BaroneAdesiWhaleyModel(NamedTuple):
+    dividendYield: float = 0.0
+
+    def __call__(self, S, K, T, riskFreeRate, sigma, isCall):
+        return baroneAdesiWhaley(S, K, T, riskFreeRate, sigma, isCall, self.dividendYield)
+
+# === Early-Exercise Premium Cache ===
+# The lattice's American-minus-European premium, divided by strike, depends only on
+# log(S / K) for a given (T, sigma, r, q, side). Tables over a log-moneyness grid are
+# computed once per (sqrt(T), sigma) bucket and interpolated, so repricing a chain at a
+# new spot, re-solving its IVs or moving to a nearby expiration rarely touches the lattice.
+class EarlyExercisePremiumCache:
+    def __init__(self, steps: int = 201, rootTimeBucket: float = 0.02, sigmaBucket: float = 0.01,
+                 moneynessGrid: np.ndarray | None = None, maxEntries: int = 4096, maxLength: int = 4096):
+        self.steps = steps
+        self.rootTimeBucket = rootTimeBucket
+        self.sigmaBucket = sigmaBucket
+        self.moneynessGrid = np.linspace(-2.0, 2.0, 161) if moneynessGrid is None else np.asarray(moneynessGrid, dtype=float)
+        self.maxEntries = maxEntries
+        # Tables are computed a batch at a time so every lattice call fits a warmed-up bucket
+        self.tablesPerCall = max(1, maxLength // len(self.moneynessGrid))
+        self.tables = OrderedDict()
+        self.lock = threading.Lock()
+
+    def computeTables(self, keys: list) -> np.ndarray:
+        if len(keys) > self.tablesPerCall:
+            return np.concatenate([self.computeTables(keys[i:i + self.tablesPerCall])
+                                   for i in range(0, len(keys), self.tablesPerCall)])
+        timeIndex, sigmaIndex, riskFreeRate, dividendYield, isCall = (np.array(column) for column in zip(*keys))
+        grid = self.moneynessGrid
+        args = (
+            np.exp(grid)[np.newaxis, :],
+            1.0,
+            ((timeIndex * self.rootTimeBucket)**2)[:, np.newaxis],
+            riskFreeRate[:, np.newaxis],
+            (sigmaIndex * self.sigmaBucket)[:, np.newaxis],
+            isCall[:, np.newaxis],
+            dividendYield[:, np.newaxis]
+        )
+        with metrics.timer("americanLattice"):
+            american = callBucketed(partial(binomialPrice, steps=self.steps), args, pricingFills + (0.0,))
+            european = callBucketed(partial(binomialPrice, steps=self.steps, earlyExercise=False), args, pricingFills + (0.0,))
+        return np.maximum(american - european, 0.0)
+
+    def lookup(self, keys: list) -> np.ndarray:
+        with self.lock:
+            found = {key: self.tables[key] for key in set(keys) if key in self.tables}
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        metrics.increment("american.premiumHits", len(keys) - len(missing))
+        metrics.increment("american.premiumMisses", len(missing))
+        if missing:
+            found.update(zip(missing, self.computeTables(missing)))
+
+        with self.lock:
+            for key, table in found.items():
+                self.tables[key] = table
+                self.tables.move_to_end(key)
+            while len(self.tables) > self.maxEntries:
+                self.tables.popitem(last=False)
+        return np.stack([found[key] for key in keys])
+
+    def premium(self, S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0) -> np.ndarray:
+        S, K, T, riskFreeRate, sigma, isCall, dividendYield = np.broadcast_arrays(
+            *(np.asarray(a, dtype=float) for a in (S, K, T, riskFreeRate, sigma)),
+            np.asarray(isCall, dtype=bool), np.asarray(dividendYield, dtype=float)
+        )
+        shape = S.shape
+        S, K, T, riskFreeRate, sigma, isCall, dividendYield = (a.ravel() for a in (S, K, T, riskFreeRate, sigma, isCall, dividendYield))
+        premium = np.zeros(S.size)
+        priced = np.flatnonzero(np.isfinite(S) & np.isfinite(K) & (K > 0) & (T > 0) & np.isfinite(sigma) & (sigma > 0))
+        if not len(priced):
+            return premium.reshape(shape)
+
+        # Bilinear between the buckets around each contract, so the premium stays continuous
+        # in sigma for the IV solver and in T as an expiration draws closer
+        timePosition = np.maximum(np.sqrt(T[priced]) / self.rootTimeBucket, 1.0)
+        timeLower = np.floor(timePosition).astype(int)
+        timeWeight = timePosition - timeLower
+        position = np.maximum(sigma[priced] / self.sigmaBucket, 1.0)
+        lower = np.floor(position).astype(int)
+        weight = position - lower
+        rates = np.round(riskFreeRate[priced], 6)
+        yields = np.round(dividendYield[priced], 6)
+        calls = isCall[priced]
+
+        keys = [(t, s, r, q, bool(c)) for t, s, r, q, c in zip(timeLower, lower, rates, yields, calls)]
+        keys += [(t, s + 1, r, q, c) for t, s, r, q, c in keys]
+        keys += [(t + 1, s, r, q, c) for t, s, r, q, c in keys]
+        tables = self.lookup(keys).reshape(2, 2, len(priced), -1)
+
+        grid = self.moneynessGrid
+        x = np.clip((np.log(S[priced] / K[priced]) - grid[0]) / (grid[1] - grid[0]), 0, len(grid) - 1.000001)
+        i = x.astype(int)
+        fraction = x - i
+        rows = np.arange(len(priced))
+
+        def interpolate(table):
+            return (1 - fraction) * table[rows, i] + fraction * table[rows, i + 1]
+
+        nearer, later = ((1 - weight) * interpolate(sigmaTables[0]) + weight * interpolate(sigmaTables[1]) for sigmaTables in tables)
+        premium[priced] = K[priced] * ((1 - timeWeight) * nearer + timeWeight * later)
+        return premium.reshape(shape)
+
+premiumCache = EarlyExercisePremiumCache()
+
+def warmUpLattice(lengths: list, cache: EarlyExercisePremiumCache = premiumCache):
+    # The premium tables' lattices at every bucket length, then one American solve through the cache
+    for length in lengths:
+        args = tuple(np.full(length, value) for value in (1.0, 1.0, 0.5, 0.05, 0.2, True, 0.0))
+        for earlyExercise in (True, False):
+            jax.block_until_ready(binomialPrice(*args, steps=cache.steps, earlyExercise=earlyExercise))
+    impliedVolatilityAmerican(np.array([4.0, 6.0]), 100.0, 100.0, 0.5, 0.05, np.array([True, False]), cache=cache)
+
+# === American Chain Wrappers ===
+def europeanWithYield(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0):
+    return blackScholesChain(np.asarray(S, dtype=float) * np.exp(-np.asarray(dividendYield) * np.asarray(T, dtype=float)),
+                             K, T, riskFreeRate, sigma, isCall)
+
+def exerciseValue(S, K, isCall) -> np.ndarray:
+    S, K = np.asarray(S, dtype=float), np.asarray(K, dtype=float)
+    return np.where(isCall, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+
+def americanChain(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0, cache: EarlyExercisePremiumCache = premiumCache):
+    # Closed-form European plus the cached lattice premium, never below immediate exercise
+    # (interpolating the premium can undershoot it deep in the exercise region)
+    price = (europeanWithYield(S, K, T, riskFreeRate, sigma, isCall, dividendYield)
+             + cache.premium(S, K, T, riskFreeRate, sigma, isCall, dividendYield))
+    return np.maximum(price, exerciseValue(S, K, isCall))
+
+def binomialChain(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0, steps: int = 201, leisenReimer: bool = True):
+    args = tuple(np.asarray(a, dtype=float) for a in (S, K, T, riskFreeRate, sigma)) + (
+        np.asarray(isCall, dtype=bool), np.asarray(dividendYield, dtype=float))
+    with metrics.timer("americanLattice"):
+        return callBucketed(partial(binomialPrice, steps=steps, leisenReimer=leisenReimer), args, pricingFills + (0.0,))
+
+def baroneAdesiWhaleyChain(S, K, T, riskFreeRate, sigma, isCall, dividendYield=0.0):
+    args = tuple(np.asarray(a, dtype=float) for a in (S, K, T, riskFreeRate, sigma)) + (
+        np.asarray(isCall, dtype=bool), np.asarray(dividendYield, dtype=float))
+    with metrics.timer("repricing"):
+        return callBucketed(baroneAdesiWhaley, args, pricingFills + (0.0,))
+
+def impliedVolatilityAmerican(marketPrice, S, K, T, riskFreeRate, isCall, sigmaGuess=None, dividendYield=0.0,
+                              maxIterations: int = 20, epsilon: float = 0.001, sigmaTolerance: float = 1e-3,
+                              minSigma: float = 1e-4, maxSigma: float = 5.0, bump: float = 1e-3,
+                              cache: EarlyExercisePremiumCache = premiumCache) -> ImpliedVolatilityResult:
+    # Safeguarded Newton on the American residual americanChain(sigma) - marketPrice, with
+    # the same convergence test as the European solver. It is seeded by de-Americanizing
+    # the quote once: strip the premium at the European IV and re-solve the European IV.
+    arrays = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (marketPrice, S, K, T, riskFreeRate, dividendYield,
+                                               np.nan if sigmaGuess is None else sigmaGuess)),
+        np.asarray(isCall, dtype=bool))
+    shape = arrays[0].shape
+    marketPrice, S, K, T, riskFreeRate, dividendYield, sigmaGuess, isCall = (a.ravel() for a in arrays)
+
+    with metrics.timer("ivSolve"):
+        # An American contract is worth at least its European floor and its immediate exercise
+        # value, and a put up to the undiscounted strike. A quote at exercise value sits in the
+        # exercise region, where every low enough sigma fits.
+        forwardSpot = S * np.exp(-dividendYield * T)
+        intrinsic = exerciseValue(S, K, isCall)
+        europeanFloor = exerciseValue(forwardSpot, K * np.exp(-riskFreeRate * T), isCall)
+        upperBound = np.where(isCall, S, K)
+        valid = (np.isfinite(marketPrice) & np.isfinite(S) & (S > 0) & (K > 0) & (T > 0)
+                 & (marketPrice > np.maximum(intrinsic, europeanFloor) - epsilon) & (marketPrice < upperBound))
+        atExercise = valid & (marketPrice <= intrinsic + epsilon)
+        solving = valid & ~atExercise
+
+        european = callBucketed(impliedVolatilityBatch, (marketPrice, forwardSpot, K, T, riskFreeRate, isCall), solverFills)
+        seed = np.where(np.isfinite(european.sigma), european.sigma, 0.3)
+        premium = cache.premium(S, K, T, riskFreeRate, seed, isCall, dividendYield)
+        european = callBucketed(impliedVolatilityBatch, (marketPrice - premium, forwardSpot, K, T, riskFreeRate, isCall, seed),
+                                solverFills + (0.5,))
+        seed = np.where(np.isfinite(european.sigma), european.sigma, seed)
+        seed = np.where(np.isfinite(sigmaGuess), sigmaGuess, seed)
+
+        sigma = np.where(solving, np.clip(seed, minSigma, maxSigma), np.nan)
+        low, high = np.full(sigma.shape, minSigma), np.full(sigma.shape, maxSigma)
+        status = np.where(valid, np.where(atExercise, IV_LOW_VEGA, IV_MAX_ITERATIONS), IV_INVALID_INPUT)
+        iterations = np.zeros(sigma.shape, dtype=np.int32)
+        roundingError = 4 * np.finfo(np.float32).eps * (S + K)
+
+        def errorAndVega(rows, sigma):
+            args = (S[rows], K[rows], T[rows], riskFreeRate[rows])
+            price = americanChain(*args, sigma, isCall[rows], dividendYield[rows], cache)
+            bumped = americanChain(*args, sigma + bump, isCall[rows], dividendYield[rows], cache)
+            return price - marketPrice[rows], (bumped - price) / bump
+
+        active = np.flatnonzero(solving)
+        for iteration in range(maxIterations + 1):
+            if not len(active):
+                break
+            error, vega = errorAndVega(active, sigma[active])
+            priced = np.abs(error) < epsilon
+            converged = priced & (np.abs(error) + roundingError[active] < sigmaTolerance * vega)
+            status[active[converged]] = IV_CONVERGED
+            if iteration == maxIterations:
+                # Out of steps: close in price but not pinned down in vol means too little vega
+                status[active[priced & ~converged]] = IV_LOW_VEGA
+                break
+
+            stepping = ~converged
+            rows, error, vega = active[stepping], error[stepping], vega[stepping]
+            high[rows] = np.where(error > 0, sigma[rows], high[rows])
+            low[rows] = np.where(error <= 0, sigma[rows], low[rows])
+            newtonSigma = sigma[rows] - error / np.where(vega > 1e-8, vega, 1.0)
+            inBracket = (vega > 1e-8) & (newtonSigma > low[rows]) & (newtonSigma < high[rows])
+            sigma[rows] = np.where(inBracket, newtonSigma, 0.5 * (low[rows] + high[rows]))
+            iterations[rows] += 1
+            active = rows
+
+        sigma = np.where(atExercise, np.nan, sigma)
+        result = ImpliedVolatilityResult(sigma.reshape(shape), status.reshape(shape), iterations.reshape(shape))
+    metrics.recordSolve(result, minSigma, maxSigma)
+    return result
@@ -2,16 +2,16 @@
 import streamlit as st 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import subprocess
-import os
 from datetime import datetime
-import seaborn as sns
-import robin_stocks.robinhood as r
-from robin_stocks.robinhood import options
 
 # ========== Utility/Calculation Function Imports==========
-from util import robinhoodLogin, fetchOptionsData
+from util import robinhoodLogin, fetchOptionsData, fetchExpirationDates
+from pricing import blackScholesCallPut, enableCompilationCache, warmUp
+from streaming import ChainStreamer
+from metrics import metrics
+from pricing import IV_CONVERGED, IV_INVALID_INPUT, IV_LOW_VEGA, IV_MAX_ITERATIONS, IV_SCREENED
+from screener import describeFlags
+from scanner import scanWatchlist
 
 # === Streamlit UI & CSS Functions ===
 def cssInjection():
@@ -57,64 +57,73 @@ def cssInjection():
     </style>
     """, unsafe_allow_html=True)
     
-def optionsTable(optionsContracts):
-    columns = [
-        "Ticker", "Strike Price", "Expiration", "Time To Maturity",
-        "Call Price", "Put Price", "Bid", "Ask", "Implied Volatility (Robinhood)"
-    ]
-    if optionsContracts:
-        inputData = [
-            {
-                "Ticker": c.ticker,
-                "Strike Price": c.strikePrice,
-                "Expiration": c.expiration,
-                "Time To Maturity": c.timeToMaturity,
-                "Call Price": c.callPrice,
-                "Put Price": c.putPrice,
-                "Bid": c.bidPrice,
-                "Ask": c.askPrice,
-                "Implied Volatility (Robinhood)": c.volatilityRobinhood
-            }
-            for c in optionsContracts
-        ]
+def optionsTable(optionChain, showSolved: bool = False):
+    columns = {
+        "strikePrice": "Strike Price",
+        "timeToMaturity": "Time To Maturity",
+        "callPrice": "Call Price",
+        "putPrice": "Put Price",
+        "bidPrice": "Call Bid",
+        "askPrice": "Call Ask",
+        "putBidPrice": "Put Bid",
+        "putAskPrice": "Put Ask",
+        "volatilityRobinhood": "Implied Volatility (Robinhood)"
+    }
+    if showSolved:
+        columns["volatilityCallValue"] = "Calculated Implied Volatility (Call)"
+        columns["volatilityPutValue"] = "Calculated Implied Volatility (Put)"
+    if optionChain:
+        df = optionChain.toDataFrame()[list(columns)].rename(columns=columns)
+        df.insert(0, "Ticker", optionChain.ticker)
+        df.insert(2, "Expiration", optionChain.expiration)
+        df["Screening Flags (Call)"] = [describeFlags(flags) for flags in optionChain.callFlags]
+        df["Screening Flags (Put)"] = [describeFlags(flags) for flags in optionChain.putFlags]
     else:
-        inputData = [
-            {
-                "Ticker": "",
-                "Strike Price": "",
-                "Expiration": "",
-                "Time To Maturity": "",
-                "Call Price": "",
-                "Put Price": "",
-                "Bid": "",
-                "Ask": "",
-                "Implied Volatility (Robinhood)": ""
-            }
-        ]
+        df = pd.DataFrame([dict.fromkeys([
+            "Ticker", "Strike Price", "Expiration", "Time To Maturity",
+            "Call Price", "Put Price", "Call Bid", "Call Ask", "Put Bid", "Put Ask", "Implied Volatility (Robinhood)"
+        ], "")])
         
-    df = pd.DataFrame(inputData, columns=columns)
     st.dataframe(df, use_container_width=True, height=200)
 
-def selectedOption(contract: object, sigmaGuess: float):
+solverStatusLabels = {
+    IV_CONVERGED: "Converged",
+    IV_MAX_ITERATIONS: "Did Not Converge",
+    IV_INVALID_INPUT: "Invalid Input",
+    IV_SCREENED: "Screened Out",
+    IV_LOW_VEGA: "No Time Value",
+    -1: "Not Solved"
+}
+
+def selectedOption(contract: object, sigmaGuess: float | None):
     
     def jaxFloat_to_pyFloat(val):
         try:
             return float(val) if val is not None else None
         except:
             return None
+
+    modelLabel = "American" if contract.chain.exerciseStyle == "american" else "Black-Scholes"
         
+    sharePrice = None
     try:
         sharePrice = contract.getSharePrice(contract.ticker)
-    except:
-        pass
+    except Exception as e:
+        metrics.increment("spot.errors")
+        st.warning(f"Could not fetch the share price for {contract.ticker}: {e}")
         
+    # Chains from the shared cache arrive solved with the closed-form guess, so auto-guess reuses them
+    alreadySolved = (sigmaGuess is None and sharePrice is not None and contract.chain.sharePrice == sharePrice
+                     and contract.volatilityCallStatus >= 0 and contract.volatilityPutStatus >= 0)
     try:
-        contract.volatilityCallValue = contract.impliedVolatilityCalculation(sharePrice, sigmaGuess, "call")
-        contract.volatilityPutValue = contract.impliedVolatilityCalculation(sharePrice, sigmaGuess, "put")
-        contract.blackScholesCallValue = contract.blackScholesCalculation(sharePrice, contract.volatilityCallValue, "call")
-        contract.blackScholesPutValue = contract.blackScholesCalculation(sharePrice, contract.volatilityPutValue, "put")
+        if not alreadySolved:
+            contract.volatilityCallValue = contract.impliedVolatilityCalculation(sharePrice, sigmaGuess, "call")
+            contract.volatilityPutValue = contract.impliedVolatilityCalculation(sharePrice, sigmaGuess, "put")
+            contract.blackScholesCallValue = contract.modelPriceCalculation(sharePrice, contract.volatilityCallValue, "call")
+            contract.blackScholesPutValue = contract.modelPriceCalculation(sharePrice, contract.volatilityPutValue, "put")
     except Exception as e:
-        print(f"Could not calculate IV or Black-Scholes: {e}")
+        metrics.increment("pricing.errors")
+        st.warning(f"Could not calculate IV or Black-Scholes: {e}")
     
 
     inputData = {
@@ -123,6 +132,8 @@ def selectedOption(contract: object, sigmaGuess: float):
         "Time to Maturity": [contract.timeToMaturity],
         "Calculated Implied Volatility (Call)": [jaxFloat_to_pyFloat(contract.volatilityCallValue)],
         "Calculated Implied Volatility (Put)": [jaxFloat_to_pyFloat(contract.volatilityPutValue)],
+        "Solver Status (Call)": [solverStatusLabels.get(contract.volatilityCallStatus)],
+        "Solver Status (Put)": [solverStatusLabels.get(contract.volatilityPutStatus)],
         "Risk-Free Interest Rate": [contract.riskFreeRate]
     }
 
@@ -132,8 +143,8 @@ def selectedOption(contract: object, sigmaGuess: float):
     inputData2 = {
         "Robinhood Call Price": [contract.callPrice],
         "Robinhood Put Price": [contract.putPrice],
-        "Black-Scholes Call Price": [jaxFloat_to_pyFloat(contract.blackScholesCallValue)],
-        "Black-Scholes Put Price": [jaxFloat_to_pyFloat(contract.blackScholesPutValue)]
+        f"{modelLabel} Call Price": [jaxFloat_to_pyFloat(contract.blackScholesCallValue)],
+        f"{modelLabel} Put Price": [jaxFloat_to_pyFloat(contract.blackScholesPutValue)]
     }
     
     df2 = pd.DataFrame(inputData2)
@@ -163,26 +174,35 @@ def selectedOption(contract: object, sigmaGuess: float):
     #         </div>
     #     """, unsafe_allow_html=True)
 
-def plotHeatmaps(contract: object, spotRange: np.ndarray, volRange: np.ndarray):
-    callPrices = np.zeros((len(volRange), len(spotRange)))
-    putPrices = np.zeros((len(volRange), len(spotRange)))
-    
-    for i, vol in enumerate(volRange):
-        for j, spot in enumerate(spotRange):
-            try:
-                callPrice = contract.blackScholesCalculation(spot, vol, "call")
-                putPrice = contract.blackScholesCalculation(spot, vol, "put")
-            except:
-                callPrice, putPrice = np.nan, np.nan
-            
-            callPrices[i, j] = callPrice
-            putPrices[i, j] = putPrice
+def heatmapTickLabels(values: np.ndarray, maxLabels: int = 10) -> list:
+    step = max(1, int(np.ceil(len(values) / maxLabels)))
+    return [f"{v:.2f}" if i % step == 0 else "" for i, v in enumerate(values)]
+
+@metrics.timer("plotting")
+def plotHeatmaps(contract: object, spotRange: np.ndarray, volRange: np.ndarray, annotationLimit: int = 15):
+    # Plotting libraries are only loaded once a contract is actually charted
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Whole (vol, spot) grid in one broadcast call: vols down the rows, spots across the columns
+    callPrices, putPrices = blackScholesCallPut(
+        spotRange[np.newaxis, :],
+        contract.strikePrice,
+        contract.timeToMaturity,
+        contract.riskFreeRate,
+        volRange[:, np.newaxis]
+    )
+    callPrices, putPrices = np.asarray(callPrices), np.asarray(putPrices)
+
+    annotate = max(len(spotRange), len(volRange)) <= annotationLimit
+    xLabels = heatmapTickLabels(spotRange)
+    yLabels = heatmapTickLabels(volRange)
     
     figCall, axCall = plt.subplots(figsize=(8, 6))
     sns.heatmap(callPrices,
-                xticklabels=np.round(spotRange, 2),
-                yticklabels=np.round(volRange, 2),
-                annot=True,
+                xticklabels=xLabels,
+                yticklabels=yLabels,
+                annot=annotate,
                 fmt=".2f",
                 cmap="viridis",
                 ax=axCall
@@ -193,9 +213,9 @@ def plotHeatmaps(contract: object, spotRange: np.ndarray, volRange: np.ndarray):
     
     figPut, axPut = plt.subplots(figsize=(8, 6))
     sns.heatmap(putPrices,
-                xticklabels=np.round(spotRange, 2),
-                yticklabels=np.round(volRange, 2),
-                annot=True,
+                xticklabels=xLabels,
+                yticklabels=yLabels,
+                annot=annotate,
                 fmt=".2f",
                 cmap="viridis",
                 ax=axPut
@@ -207,8 +227,42 @@ def plotHeatmaps(contract: object, spotRange: np.ndarray, volRange: np.ndarray):
 
     return figCall, figPut
 
+@st.cache_resource
+def pricingWarmUp():
+    # Runs once per server process; later sessions find every kernel already compiled
+    enableCompilationCache()
+    warmUp()
+    return True
+
+def diagnosticsPanel(optionChain):
+    snapshot = metrics.snapshot()
+    st.subheader("🩺Diagnostics:")
+    st.info("Timings and counters are process-wide, so they include every session served by this app.", icon="ℹ️")
+
+    col1, col2 = st.columns([1,1], gap="small")
+    with col1:
+        timers = pd.DataFrame.from_dict(snapshot["timers"], orient="index")
+        timers.index.name = "Stage"
+        st.dataframe(timers, use_container_width=True)
+    with col2:
+        counters = pd.DataFrame({"Count": snapshot["counters"]})
+        counters.index.name = "Counter"
+        st.dataframe(counters, use_container_width=True)
+
+    if optionChain:
+        status = pd.DataFrame({
+            "Strike Price": optionChain.strikePrice,
+            "Call Status": [solverStatusLabels.get(s) for s in optionChain.volatilityCallStatus],
+            "Put Status": [solverStatusLabels.get(s) for s in optionChain.volatilityPutStatus]
+        })
+        st.dataframe(status, use_container_width=True, height=200)
+
+    with st.expander("Prometheus Metrics"):
+        st.code(metrics.prometheusText(), language="text")
+
 # === Main Streamlit Application ===
 robinhoodLogin()
+pricingWarmUp()
     
 st.set_page_config(
     layout="wide",
@@ -243,8 +297,8 @@ st.info("Listed below is a table of options contracts pertaining to a specific s
 if "expirations" not in st.session_state:
     st.session_state.expirations = []
 
-if "optionContracts" not in st.session_state:
-    st.session_state.optionContracts = []
+if "optionChain" not in st.session_state:
+    st.session_state.optionChain = None
 
 if "strikes" not in st.session_state:
     st.session_state.strikes = []
@@ -276,8 +330,7 @@ with st.sidebar:
     ticker = st.selectbox("Stock Ticker:", options=tickers, placeholder="Please select a stock")
     if ticker:
         try:
-            chain = r.options.get_chains(ticker)
-            st.session_state.expirations = chain['expiration_dates']
+            st.session_state.expirations = fetchExpirationDates(ticker)
         except Exception as e:
             st.warning(f"Could not load expirations: {e}")
             st.session_state.expirations = []
@@ -285,25 +338,62 @@ with st.sidebar:
     fetchData = st.button("Fetch Options Data")
     if fetchData and ticker and selectedExpiration:
         try:
-            optionContracts = fetchOptionsData(ticker, selectedExpiration)
-            strikes = sorted({c.strikePrice for c in optionContracts})
-            st.session_state.optionContracts = optionContracts
-            st.session_state.strikes = strikes
+            optionChain = fetchOptionsData(ticker, selectedExpiration)
+            st.session_state.optionChain = optionChain
+            st.session_state.strikes = optionChain.strikePrice.tolist() if optionChain else []
+            st.session_state.chainStreamer = ChainStreamer(ticker, selectedExpiration, chain=optionChain) if optionChain else None
         except Exception as e:
             st.error(f"Falied to fetch options: {e}")
-            st.session_state.optionContracts = []
+            st.session_state.optionChain = None
             st.session_state.strikes = []
+            st.session_state.chainStreamer = None
+
+    americanStyle = st.checkbox("American-Style Exercise", value=False, help="Backs out IV with a lattice early-exercise premium on top of Black-Scholes, as Robinhood equity options are American-style.")
+    if st.session_state.optionChain:
+        exerciseStyle = "american" if americanStyle else "european"
+        if st.session_state.optionChain.exerciseStyle != exerciseStyle:
+            st.session_state.optionChain.exerciseStyle = exerciseStyle
+            st.session_state.optionChain.solveImpliedVolatility()
+
+    liveUpdates = st.checkbox("Live Updates", value=False, disabled=not st.session_state.optionChain, help="Polls quotes and only re-solves contracts whose price or the share price moved.")
+    refreshInterval = st.slider("Refresh Interval (Seconds):", min_value=1, max_value=30, value=2, disabled=not liveUpdates)
     
     st.markdown("---")
     
     st.title("Contract Pricing Inputs")
-    selectedStrike = st.selectbox("Strike Price:", options=st.session_state.strikes, disabled=not st.session_state.optionContracts)
-    sigmaGuess = st.slider("Enter a Volatility Guess:", min_value=0.01, max_value=1.0)
+    selectedStrike = st.selectbox("Strike Price:", options=st.session_state.strikes, disabled=not st.session_state.optionChain)
+    autoGuess = st.checkbox("Seed Volatility From Market Price", value=True, help="Starts the solver from a closed-form estimate (Corrado-Miller and friends) instead of the slider value.")
+    sigmaGuess = st.slider("Enter a Volatility Guess:", min_value=0.01, max_value=1.0, disabled=autoGuess)
+    heatmapResolution = st.slider("Heatmap Resolution:", min_value=10, max_value=250, value=10, step=10, help="Cell values are only printed on grids of 15x15 or smaller.")
     
     st.markdown("---")
+
+    st.title("Mispricing Scanner")
+    showScanner = st.checkbox("Show Mispricing Scanner", value=False, help="Ranks every contract on the watchlist by edge against a fitted smile, net of the bid/ask spread.")
+    watchlist = st.multiselect("Watchlist:", options=tickers, default=[ticker] if ticker else [], disabled=not showScanner)
+    scannerExpirations = st.slider("Expirations Per Ticker:", min_value=1, max_value=12, value=4, disabled=not showScanner)
+    scannerRows = st.slider("Contracts Shown:", min_value=5, max_value=100, value=25, step=5, disabled=not showScanner)
+
+    st.markdown("---")
+
+    showDiagnostics = st.checkbox("Show Diagnostics", value=False, help="Stage timings, solver counters and per-contract solver status.")
    
 #============================================================================
-optionsTable(st.session_state.optionContracts)
+@st.fragment(run_every=refreshInterval if liveUpdates else None)
+def liveOptionsTable():
+    # Only this fragment reruns on each refresh, so the table updates in place
+    streamer = st.session_state.get("chainStreamer")
+    if liveUpdates and streamer:
+        try:
+            streamer.poll()
+            st.session_state.strikes = streamer.chain.strikePrice.tolist()
+        except Exception as e:
+            st.warning(f"Live update failed: {e}")
+    optionsTable(st.session_state.optionChain, showSolved=liveUpdates)
+    if liveUpdates and streamer and streamer.lastUpdate:
+        st.caption(f"Last update {datetime.fromtimestamp(streamer.lastUpdate):%H:%M:%S}: re-solved {streamer.lastResolved} contracts.")
+
+liveOptionsTable()
 
 with st.expander("ℹ️ What exactly am I looking at? (Options Contracts Table Explanation)"):
     st.markdown("""
@@ -311,24 +401,23 @@ with st.expander("ℹ️ What exactly am I looking at? (Options Contracts Table
                 - **Strike Price**: The agreed price to buy (call) or sell (put) the stock.
                 - **Time to Maturity**: Days until expiration, expressed as a fraction of a year (used in Black-Scholes calculations).
                 - **Call/Put Price**: Market price from Robinhood.
-                - **Bid/Ask**: Best current prices to buy/sell each option.
+                - **Bid/Ask**: Best current prices to buy/sell each call and put.
                 - **Implied Volatility**: A market-derived estimate of expected future volatility, pulled directly from Robinhood.
                 """)
 
 st.markdown("---")
 
 if selectedStrike:
-    matches = [c for c in st.session_state.optionContracts if c.strikePrice == selectedStrike]
-    if matches:
+    selectedContract = st.session_state.optionChain.find(selectedStrike) if st.session_state.optionChain else None
+    if selectedContract:
         st.subheader("📈Selected Option Contract Details:")
         st.info("Listed below is the option contract details for your selected strike. Implied Volatility is calculated using the Newton-Raphson Method to minimize the difference between theoretical and market prices, then calculates the gradient of the Black-Scholes formula. If the Black-Scholes formula outputs a price more expensive than market price, then that contract is undervalued and should be bought.", icon="ℹ️")
-        selectedContract = matches[0]
-        selectedOption(selectedContract, sigmaGuess)
+        selectedOption(selectedContract, None if autoGuess else sigmaGuess)
         with st.expander("ℹ️ What do these numbers mean? (Contract Pricing Breakdown)"):
             st.markdown("""
             You're viewing the **pricing and implied volatility breakdown** for the specific contract you selected:
             
-            - **Implied Volatility (Call/Put)**: Computed using **Newton-Raphson root-finding** to back out volatility from the market price using the Black-Scholes formula.
+            - **Implied Volatility (Call/Put)**: Computed using **Newton-Raphson root-finding** to back out volatility from the market price using the Black-Scholes formula. Steps that would leave the current volatility bracket fall back to bisection.
             - **Black-Scholes Price (Call/Put)**: Theoretical price of the option assuming constant volatility and no arbitrage.
             - **Comparison**: You can compare Robinhood's market price with Black-Scholes pricing to see how fair or mispriced the option may be.
 
@@ -339,8 +428,8 @@ if selectedStrike:
         
         st.info("Listed below are heatmaps generated using the Black-Scholes formula on our real market data.", icon="ℹ️")
         
-        spotRange = np.linspace(selectedContract.strikePrice * 0.8, selectedContract.strikePrice * 1.2, 10)
-        volRange = np.linspace(0.1, 1.0, 10)
+        spotRange = np.linspace(selectedContract.strikePrice * 0.8, selectedContract.strikePrice * 1.2, heatmapResolution)
+        volRange = np.linspace(0.1, 1.0, heatmapResolution)
         
         figCall, figPut = plotHeatmaps(selectedContract, spotRange, volRange)
         
@@ -366,12 +455,30 @@ if selectedStrike:
             - Can identify extreme scenarios for stress testing
             """)
 
+@st.fragment(run_every=refreshInterval if liveUpdates else None)
+def mispricingScanner():
+    try:
+        ranked = scanWatchlist(watchlist, scannerRows, scannerExpirations)
+    except Exception as e:
+        st.warning(f"Scan failed: {e}")
+        return
+    if ranked.empty:
+        st.info("No two-sided quotes to scan on this watchlist.", icon="ℹ️")
+        return
+    st.dataframe(ranked.rename(columns={
+        "ticker": "Ticker", "expiration": "Expiration", "strikePrice": "Strike Price", "optionType": "Type",
+        "side": "Side", "bidPrice": "Bid", "midPrice": "Mid", "askPrice": "Ask", "markPrice": "Mark",
+        "bidVolatility": "Bid IV", "midVolatility": "Mid IV", "askVolatility": "Ask IV",
+        "modelVolatility": "Model IV", "modelPrice": "Model Price", "edge": "Edge", "netEdge": "Edge Net of Spread",
+        "flags": "Screening Flags"
+    }), use_container_width=True, height=400)
+
+if showScanner and watchlist:
+    st.markdown("---")
+    st.subheader("🔎Mispricing Scanner:")
+    st.info("Bid, mid and ask implied volatilities are solved for every contract on the watchlist. The model price comes from a smile fitted to each expiration's out-of-the-money quotes; edge net of spread is what is left after crossing the bid/ask.", icon="ℹ️")
+    mispricingScanner()
 
-
-        
-        
-
-
-
-
-        
\ No newline at end of file
+if showDiagnostics:
+    st.markdown("---")
+    diagnosticsPanel(st.session_state.optionChain)
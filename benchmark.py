@@ -0,0 +1,169 @@
+# === Import Libraries ===
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+import jax
+import numpy as np
+from chain import OptionContract
+from fetch import buildOptionChain
+from pricing import (IV_CONVERGED, IV_LOW_VEGA, blackScholesCallPut, blackScholesChain, blackScholesGreeksChain,
+                     impliedVolatilityChain)
+
+# === Synthetic Chains ===
+# Quotes are priced from a known smile so the solver has an exact answer to recover.
+def syntheticChain(size: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    S = np.full(size, 100.0)
+    K = rng.uniform(50.0, 150.0, size)
+    T = rng.choice(np.array([7, 14, 30, 60, 90, 180, 365, 730]) / 365, size)
+    riskFreeRate = np.full(size, 0.05)
+    sigma = 0.2 + 0.25 * np.log(K / S)**2 / np.sqrt(T) - 0.05 * np.log(K / S)
+    isCall = rng.random(size) < 0.5
+    price = blackScholesChain(S, K, T, riskFreeRate, sigma, isCall)
+    return {"S": S, "K": K, "T": T, "riskFreeRate": riskFreeRate, "sigma": sigma, "isCall": isCall, "price": price}
+
+def syntheticQuotes(size: int, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    strikes = np.round(np.sort(rng.uniform(50.0, 150.0, size)), 2)
+    calls = [{'strike_price': str(k), 'mark_price': '1.25', 'bid_price': '1.20', 'ask_price': '1.30',
+              'implied_volatility': '0.25'} for k in strikes]
+    puts = [{'strike_price': str(k), 'mark_price': '1.05', 'bid_price': '1.00', 'ask_price': '1.10',
+             'implied_volatility': '0.27'} for k in strikes]
+    return calls, puts
+
+# === Timing Helpers ===
+def timeIt(function, repeats: int, warm: bool = True) -> dict:
+    # One untimed call first so compilation is not billed to the hot path
+    if warm:
+        jax.block_until_ready(function())
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        jax.block_until_ready(function())
+        samples.append(time.perf_counter() - start)
+    return {"seconds": min(samples), "medianSeconds": statistics.median(samples), "repeats": repeats}
+
+# === Benchmarks ===
+def benchmarkPricing(size: int, repeats: int) -> list:
+    chain = syntheticChain(size)
+    args = (chain["S"], chain["K"], chain["T"], chain["riskFreeRate"], chain["sigma"], chain["isCall"])
+    batched = timeIt(lambda: blackScholesChain(*args), repeats)
+
+    # Per-contract path is timed on a sample and reported per contract to stay tractable
+    sample = min(size, 200)
+    contracts = [OptionContract("SYN", chain["K"][i], "", chain["T"][i], None, None, None, None, None)
+                 for i in range(sample)]
+    scalar = timeIt(lambda: [c.blackScholesCalculation(100.0, chain["sigma"][i], 'call' if chain["isCall"][i] else 'put')
+                             for i, c in enumerate(contracts)], 1, warm=False)
+    scalarPerContract = scalar["seconds"] / sample
+    return [
+        {"benchmark": "pricing.batched", "size": size, **batched,
+         "contractsPerSecond": size / batched["seconds"]},
+        {"benchmark": "pricing.scalar", "size": size, "sampledContracts": sample,
+         "seconds": scalarPerContract * size, "secondsPerContract": scalarPerContract,
+         "speedup": scalarPerContract * size / batched["seconds"]}
+    ]
+
+def benchmarkGreeks(size: int, repeats: int) -> list:
+    chain = syntheticChain(size)
+    args = (chain["S"], chain["K"], chain["T"], chain["riskFreeRate"], chain["sigma"], chain["isCall"])
+    result = timeIt(lambda: blackScholesGreeksChain(*args), repeats)
+    return [{"benchmark": "greeks.batched", "size": size, **result, "contractsPerSecond": size / result["seconds"]}]
+
+def benchmarkImpliedVolatility(size: int, repeats: int) -> list:
+    chain = syntheticChain(size)
+    args = (chain["price"], chain["S"], chain["K"], chain["T"], chain["riskFreeRate"], chain["isCall"])
+    rows = []
+    for name, guess in (("closedFormGuess", None), ("flatGuess", np.full(size, 0.5))):
+        timing = timeIt(lambda: impliedVolatilityChain(*args, guess).sigma, repeats)
+        result = impliedVolatilityChain(*args, guess)
+        converged = result.status == IV_CONVERGED
+        rows.append({
+            "benchmark": f"impliedVolatility.{name}",
+            "size": size,
+            **timing,
+            "contractsPerSecond": size / timing["seconds"],
+            "convergedFraction": float(converged.mean()),
+            "lowVegaFraction": float((result.status == IV_LOW_VEGA).mean()),
+            "meanIterations": float(result.iterations[converged].mean()) if converged.any() else None,
+            "maxIterations": int(result.iterations.max()),
+            "maxAbsoluteError": float(np.nanmax(np.abs(result.sigma - chain["sigma"])[converged])) if converged.any() else None
+        })
+    return rows
+
+def benchmarkHeatmap(resolution: int, repeats: int) -> list:
+    spotRange = np.linspace(80.0, 120.0, resolution)
+    volRange = np.linspace(0.1, 1.0, resolution)
+    result = timeIt(lambda: blackScholesCallPut(spotRange[np.newaxis, :], 100.0, 0.25, 0.05, volRange[:, np.newaxis]), repeats)
+    return [{"benchmark": "heatmap.grid", "size": resolution * resolution, "resolution": resolution, **result}]
+
+def benchmarkChainAssembly(size: int, repeats: int) -> list:
+    calls, puts = syntheticQuotes(size)
+    built = timeIt(lambda: buildOptionChain("SYN", "2030-01-18", calls, puts), repeats)
+    chain = buildOptionChain("SYN", "2030-01-18", calls, puts)
+    strikes = chain.strikePrice[np.random.default_rng(1).integers(0, len(chain), 1000)]
+    lookup = timeIt(lambda: [chain.find(k) for k in strikes], repeats)
+    frame = timeIt(lambda: chain.toDataFrame(), repeats)
+    return [
+        {"benchmark": "chain.build", "size": size, **built},
+        {"benchmark": "chain.strikeLookup", "size": size, "lookups": len(strikes), **lookup},
+        {"benchmark": "chain.toDataFrame", "size": size, **frame}
+    ]
+
+def benchmarkCompilation(size: int) -> list:
+    chain = syntheticChain(size)
+    args = (chain["price"], chain["S"], chain["K"], chain["T"], chain["riskFreeRate"], chain["isCall"])
+    jax.clear_caches()
+    cold = timeIt(lambda: impliedVolatilityChain(*args).sigma, 1, warm=False)
+    warm = timeIt(lambda: impliedVolatilityChain(*args).sigma, 3)
+    return [
+        {"benchmark": "jit.impliedVolatility.cold", "size": size, **cold},
+        {"benchmark": "jit.impliedVolatility.warm", "size": size, **warm}
+    ]
+
+def runBenchmarks(sizes: list, heatmapResolutions: list, repeats: int) -> dict:
+    results = []
+    results += benchmarkCompilation(min(sizes))
+    for size in sizes:
+        print(f"Benchmarking {size} contracts...", file=sys.stderr)
+        results += benchmarkPricing(size, repeats)
+        results += benchmarkGreeks(size, repeats)
+        results += benchmarkImpliedVolatility(size, repeats)
+        if size <= 100_000:
+            results += benchmarkChainAssembly(size, repeats)
+    for resolution in heatmapResolutions:
+        results += benchmarkHeatmap(resolution, repeats)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jax": jax.__version__,
+        "backend": jax.default_backend(),
+        "results": results
+    }
+
+# === Command Line Entry Point ===
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pricing, IV and chain-building hot paths on synthetic chains.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--heatmap-resolutions", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = runBenchmarks(args.sizes, args.heatmap_resolutions, args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
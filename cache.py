@@ -0,0 +1,135 @@
+# === Import Libraries ===
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from providers import MarketDataProvider, getProvider
+from metrics import metrics
+
+# === Spot Price Cache ===
+# Every contract in a chain shares its underlying, so spot is fetched once per
+# ticker and reused until it is older than the TTL (or the provider's snapshot moves).
+class SpotPriceCache:
+    def __init__(self, provider: MarketDataProvider | None = None, ttl: float = 15.0):
+        self.provider = provider
+        self.ttl = ttl
+        self.prices = {}
+        self.lock = threading.Lock()
+
+    def currentProvider(self) -> MarketDataProvider:
+        return self.provider or getProvider()
+
+    def isFresh(self, entry: tuple, asOf) -> bool:
+        price, fetchedAt, entryAsOf = entry
+        return entryAsOf == asOf and time.monotonic() - fetchedAt < self.ttl
+
+    def refresh(self, tickers: list) -> dict:
+        provider = self.currentProvider()
+        with metrics.timer("spotLookup"):
+            prices = provider.getSharePrices(list(tickers))
+        fetchedAt, asOf = time.monotonic(), provider.asOf()
+        with self.lock:
+            for ticker, price in prices.items():
+                if price is not None:
+                    self.prices[ticker] = (price, fetchedAt, asOf)
+        return prices
+
+    def getMany(self, tickers: list) -> dict:
+        asOf = self.currentProvider().asOf()
+        with self.lock:
+            cached = {t: self.prices[t][0] for t in tickers if t in self.prices and self.isFresh(self.prices[t], asOf)}
+        stale = [t for t in tickers if t not in cached]
+        metrics.increment("spot.cacheHits", len(cached))
+        metrics.increment("spot.cacheMisses", len(stale))
+        if stale:
+            cached.update(self.refresh(stale))
+        return {t: cached.get(t) for t in tickers}
+
+    def get(self, ticker: str) -> float | None:
+        return self.getMany([ticker])[ticker]
+
+    def invalidate(self, ticker: str | None = None):
+        with self.lock:
+            if ticker is None:
+                self.prices.clear()
+            else:
+                self.prices.pop(ticker, None)
+
+spotPriceCache = SpotPriceCache()
+
+def getSharePrice(ticker: str) -> float | None:
+    return spotPriceCache.get(ticker)
+
+# === Shared Result Cache ===
+# Process-wide, so every Streamlit session served by this process reuses the same
+# chains, expirations and surfaces. Keys carry the provider's snapshot time, so a
+# replay that advances never serves a stale snapshot. Concurrent misses on one key
+# wait for the first caller's result instead of issuing their own broker requests.
+class SharedCache:
+    def __init__(self, maxEntries: int = 256, ttl: float = 300.0):
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, key: tuple):
+        # Caller holds the lock; returns (found, value)
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        value, storedAt = entry
+        if time.monotonic() - storedAt >= self.ttl:
+            del self.entries[key]
+            return False, None
+        self.entries.move_to_end(key)
+        return True, value
+
+    def store(self, key: tuple, value):
+        # Caller holds the lock
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+            metrics.increment("cache.evictions")
+
+    def getOrCompute(self, key: tuple, compute):
+        with self.lock:
+            found, value = self.lookup(key)
+            if found:
+                metrics.increment("cache.hits")
+                return value
+            future = self.pending.get(key)
+            isOwner = future is None
+            if isOwner:
+                future = self.pending[key] = Future()
+
+        if not isOwner:
+            metrics.increment("cache.coalesced")
+            return future.result()
+
+        metrics.increment("cache.misses")
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            # Empty results (failed fetches) are handed to waiters but not kept
+            if value is not None:
+                self.store(key, value)
+            del self.pending[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, ticker: str | None = None):
+        with self.lock:
+            for key in [k for k in self.entries if ticker is None or k[1] == ticker]:
+                del self.entries[key]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+sharedCache = SharedCache()
@@ -0,0 +1,367 @@
+# === Import Libraries ===
+from datetime import datetime
+import numpy as np
+from pricing import IV_SCREENED, Greeks, blackScholesChain, blackScholesGreeksChain, impliedVolatilityChain
+from cache import spotPriceCache
+from american import americanChain, impliedVolatilityAmerican
+from screener import FLAG_ALL, FLAG_CALENDAR, ParityFit, screenChain
+
+# === Class Data Structures ===
+class OptionChain:
+    # bidPrice/askPrice are the call side's quote; the put side has its own columns
+    priceColumns = ("strikePrice", "timeToMaturity", "bidPrice", "askPrice",
+                    "callPrice", "putPrice", "volatilityRobinhood", "putBidPrice", "putAskPrice")
+    resultColumns = ("volatilityCallValue", "volatilityPutValue",
+                     "blackScholesCallValue", "blackScholesPutValue")
+    statusColumns = ("volatilityCallStatus", "volatilityPutStatus")
+    flagColumns = ("callFlags", "putFlags")
+
+    # Screening flags that keep a contract out of the IV solve; 0 disables screening
+    excludeFlags = FLAG_ALL
+
+    # "american" solves and reprices with the cached early-exercise premium on top of Black-Scholes
+    exerciseStyle = "european"
+    dividendYield = 0.0
+
+    def __init__(self,
+                 ticker,
+                 expiration,
+                 strikePrice,
+                 timeToMaturity,
+                 bidPrice,
+                 askPrice,
+                 callPrice,
+                 putPrice,
+                 volatilityRobinhood,
+                 riskFreeRate=0.05,
+                 putBidPrice=None,
+                 putAskPrice=None
+                 ):
+        self.ticker = ticker
+        self.expiration = expiration
+        self.riskFreeRate = riskFreeRate
+
+        # Rows are kept sorted by strike so lookups can bisect the strike column
+        strikePrice = self.floatColumn(strikePrice)
+        order = np.argsort(strikePrice, kind="stable")
+        rows = len(strikePrice)
+        for name, values in zip(self.priceColumns, (strikePrice, timeToMaturity, bidPrice, askPrice, callPrice,
+                                                    putPrice, volatilityRobinhood, putBidPrice, putAskPrice)):
+            column = np.broadcast_to(self.floatColumn(values), (rows,))
+            setattr(self, name, np.ascontiguousarray(column[order]))
+        for name in self.resultColumns:
+            setattr(self, name, np.full(rows, np.nan))
+        for name in self.statusColumns:
+            setattr(self, name, np.full(rows, -1, dtype=np.int32))
+        for name in self.flagColumns:
+            setattr(self, name, np.zeros(rows, dtype=np.int32))
+        self.sharePrice = None
+        self.parity = None
+
+    @staticmethod
+    def floatColumn(values) -> np.ndarray:
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = np.where(np.equal(values, None), np.nan, values)
+        return values.astype(float)
+
+    def __len__(self) -> int:
+        return len(self.strikePrice)
+
+    def __getitem__(self, index: int) -> "OptionContract":
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return OptionContract.fromChain(self, index % len(self))
+
+    def __iter__(self):
+        return (OptionContract.fromChain(self, i) for i in range(len(self)))
+
+    def strikeIndex(self, strikePrice: float) -> int | None:
+        i = int(np.searchsorted(self.strikePrice, strikePrice))
+        if i < len(self) and self.strikePrice[i] == strikePrice:
+            return i
+        return None
+
+    def find(self, strikePrice: float) -> "OptionContract | None":
+        i = self.strikeIndex(strikePrice)
+        return OptionContract.fromChain(self, i) if i is not None else None
+
+    def copy(self) -> "OptionChain":
+        chain = object.__new__(OptionChain)
+        chain.__dict__.update(self.__dict__)
+        for name in self.priceColumns + self.resultColumns + self.statusColumns + self.flagColumns:
+            setattr(chain, name, getattr(self, name).copy())
+        return chain
+
+    def toDataFrame(self) -> "pd.DataFrame":
+        import pandas as pd
+        columns = self.priceColumns + self.resultColumns + self.statusColumns + self.flagColumns
+        return pd.DataFrame({name: getattr(self, name) for name in columns}, copy=False)
+
+    def screen(self, tolerance: float = 0.05) -> ParityFit:
+        callFlags, putFlags, self.parity = screenChain(self, tolerance)
+        # Calendar flags need the other expirations, so they are left to screenCalendar
+        self.callFlags[:] = callFlags | (self.callFlags & FLAG_CALENDAR)
+        self.putFlags[:] = putFlags | (self.putFlags & FLAG_CALENDAR)
+        return self.parity
+
+    def excluded(self) -> tuple:
+        return (self.callFlags & self.excludeFlags) != 0, (self.putFlags & self.excludeFlags) != 0
+
+    def modelImpliedVolatility(self, marketPrice, S, K, T, isCall, sigmaGuess=None):
+        if self.exerciseStyle == "american":
+            return impliedVolatilityAmerican(marketPrice, S, K, T, self.riskFreeRate, isCall, sigmaGuess, self.dividendYield)
+        return impliedVolatilityChain(marketPrice, S, K, T, self.riskFreeRate, isCall, sigmaGuess)
+
+    def modelPrice(self, S, K, T, sigma, isCall):
+        if self.exerciseStyle == "american":
+            return americanChain(S, K, T, self.riskFreeRate, sigma, isCall, self.dividendYield)
+        return blackScholesChain(S, K, T, self.riskFreeRate, sigma, isCall)
+
+    def solveImpliedVolatility(self, S: float | None = None, sigmaGuess: float | None = None):
+        if S is None:
+            S = spotPriceCache.get(self.ticker)
+        self.screen()
+        callExcluded, putExcluded = self.excluded()
+        # Calls and puts are stacked so both sides solve in a single compiled call
+        result = self.modelImpliedVolatility(
+            np.stack([np.where(callExcluded, np.nan, self.callPrice), np.where(putExcluded, np.nan, self.putPrice)]),
+            S if S is not None else np.nan,
+            self.strikePrice,
+            self.timeToMaturity,
+            np.array([[True], [False]]),
+            sigmaGuess
+        )
+        self.volatilityCallValue[:], self.volatilityPutValue[:] = np.asarray(result.sigma)
+        self.volatilityCallStatus[:], self.volatilityPutStatus[:] = np.asarray(result.status)
+        self.volatilityCallStatus[callExcluded], self.volatilityPutStatus[putExcluded] = IV_SCREENED, IV_SCREENED
+
+        modelValue = self.modelPrice(S, self.strikePrice, self.timeToMaturity, result.sigma, np.array([[True], [False]]))
+        self.blackScholesCallValue[:], self.blackScholesPutValue[:] = np.asarray(modelValue)
+        self.sharePrice = S
+        return result
+
+    def solveRows(self, S: float, callRows: np.ndarray, putRows: np.ndarray, warmStart: bool = True) -> int:
+        # Re-solves only the given rows, starting each from its previous IV when it has one
+        rows = np.concatenate([callRows, putRows]).astype(int)
+        if len(rows) == 0:
+            self.sharePrice = S
+            return 0
+        isCall = np.arange(len(rows)) < len(callRows)
+        callExcluded, putExcluded = self.excluded()
+        excluded = np.where(isCall, callExcluded[rows], putExcluded[rows])
+        marketPrice = np.where(excluded, np.nan, np.where(isCall, self.callPrice[rows], self.putPrice[rows]))
+        previous = np.where(isCall, self.volatilityCallValue[rows], self.volatilityPutValue[rows])
+        sigmaGuess = previous if warmStart else np.full(len(rows), np.nan)
+
+        result = self.modelImpliedVolatility(marketPrice, S, self.strikePrice[rows], self.timeToMaturity[rows],
+                                             isCall, sigmaGuess)
+        modelValue = self.modelPrice(S, self.strikePrice[rows], self.timeToMaturity[rows], result.sigma, isCall)
+
+        calls, puts = rows[isCall], rows[~isCall]
+        status = np.where(excluded, IV_SCREENED, result.status)
+        self.volatilityCallValue[calls], self.volatilityPutValue[puts] = result.sigma[isCall], result.sigma[~isCall]
+        self.volatilityCallStatus[calls], self.volatilityPutStatus[puts] = status[isCall], status[~isCall]
+        self.blackScholesCallValue[calls], self.blackScholesPutValue[puts] = modelValue[isCall], modelValue[~isCall]
+        self.sharePrice = S
+        return len(rows)
+
+    @staticmethod
+    def columnChanged(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+        return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+
+    def update(self, latest: "OptionChain", S: float | None = None) -> int:
+        # Takes the latest quotes for this chain and re-solves only the contracts whose
+        # mark (or maturity, or the spot) moved. Returns how many were re-solved.
+        if S is None:
+            S = spotPriceCache.get(self.ticker)
+
+        if not np.array_equal(self.strikePrice, latest.strikePrice):
+            # Strikes were listed or delisted: carry previous solutions over by strike
+            position = np.searchsorted(self.strikePrice, latest.strikePrice)
+            matched = position < len(self)
+            matched[matched] = self.strikePrice[position[matched]] == latest.strikePrice[matched]
+            source = position[matched]
+
+            previous = {}
+            for name in ("callPrice", "putPrice", "timeToMaturity"):
+                previous[name] = np.full(len(latest), np.nan)
+                previous[name][matched] = getattr(self, name)[source]
+            for name in self.resultColumns + self.statusColumns:
+                getattr(latest, name)[matched] = getattr(self, name)[source]
+            for name in self.priceColumns + self.resultColumns + self.statusColumns + self.flagColumns:
+                setattr(self, name, getattr(latest, name))
+        else:
+            previous = {name: getattr(self, name).copy() for name in ("callPrice", "putPrice", "timeToMaturity")}
+            for name in self.priceColumns:
+                getattr(self, name)[:] = getattr(latest, name)
+
+        # A quote moving can flag or clear its neighbours too, so those rows are re-solved as well
+        self.screen()
+        callExcluded, putExcluded = self.excluded()
+        callScreenMoved = (self.volatilityCallStatus == IV_SCREENED) != callExcluded
+        putScreenMoved = (self.volatilityPutStatus == IV_SCREENED) != putExcluded
+
+        spotMoved = self.sharePrice != S
+        maturityMoved = self.columnChanged(previous["timeToMaturity"], self.timeToMaturity)
+        callChanged = spotMoved | maturityMoved | self.columnChanged(previous["callPrice"], self.callPrice) | (self.volatilityCallStatus < 0) | callScreenMoved
+        putChanged = spotMoved | maturityMoved | self.columnChanged(previous["putPrice"], self.putPrice) | (self.volatilityPutStatus < 0) | putScreenMoved
+        return self.solveRows(S, np.flatnonzero(callChanged), np.flatnonzero(putChanged))
+
+    def applyQuotes(self, quotes: list, S: float | None = None) -> int:
+        # Pushed deltas: robin_stocks-shaped quote dicts that also carry 'optionType'
+        latest = {name: getattr(self, name).copy() for name in self.priceColumns}
+        for quote in quotes:
+            row = self.strikeIndex(float(quote['strike_price']))
+            if row is None:
+                continue
+            side = 'callPrice' if quote['optionType'] == 'call' else 'putPrice'
+            if quote.get('mark_price'):
+                latest[side][row] = float(quote['mark_price'])
+            bidColumn, askColumn = ('bidPrice', 'askPrice') if quote['optionType'] == 'call' else ('putBidPrice', 'putAskPrice')
+            for field, column in (('bid_price', bidColumn), ('ask_price', askColumn)):
+                if quote.get(field):
+                    latest[column][row] = float(quote[field])
+        return self.update(OptionChain(self.ticker, self.expiration, riskFreeRate=self.riskFreeRate, **latest), S)
+
+    def computeGreeks(self, S: float | None = None) -> tuple:
+        # Row 0 of every Greek is the call side, row 1 the put side, aligned with the strikes
+        if S is None:
+            S = spotPriceCache.get(self.ticker)
+        if np.all(self.volatilityCallStatus < 0):
+            self.solveImpliedVolatility(S)
+        greeks = blackScholesGreeksChain(S, self.strikePrice, self.timeToMaturity, self.riskFreeRate,
+                                         np.stack([self.volatilityCallValue, self.volatilityPutValue]),
+                                         np.array([[True], [False]]))
+        callGreeks = Greeks(*(np.asarray(value)[0] for value in greeks))
+        putGreeks = Greeks(*(np.asarray(value)[1] for value in greeks))
+        return callGreeks, putGreeks
+
+def chainColumn(name: str) -> property:
+    def getValue(self):
+        value = getattr(self.chain, name)[self.index]
+        if name in OptionChain.statusColumns:
+            return int(value) if value >= 0 else None
+        if name in OptionChain.flagColumns:
+            return int(value)
+        return float(value) if not np.isnan(value) else None
+
+    def setValue(self, value):
+        if name in OptionChain.statusColumns:
+            getattr(self.chain, name)[self.index] = -1 if value is None else int(value)
+        elif name in OptionChain.flagColumns:
+            getattr(self.chain, name)[self.index] = int(value or 0)
+        else:
+            getattr(self.chain, name)[self.index] = np.nan if value is None else float(value)
+
+    return property(getValue, setValue)
+
+class OptionContract:
+    # A view over one row of an OptionChain; values live in the chain's columns
+    __slots__ = ("chain", "index")
+
+    def __init__(self, 
+                 ticker, 
+                 strikePrice, 
+                 expiration, 
+                 timeToMaturity, 
+                 bidPrice, 
+                 askPrice, 
+                 callPrice, 
+                 putPrice, 
+                 volatilityRobinhood,
+                 putBidPrice=None,
+                 putAskPrice=None
+                 ):
+        self.chain = OptionChain(ticker, expiration, [strikePrice], timeToMaturity, bidPrice, askPrice,
+                                 callPrice, putPrice, volatilityRobinhood,
+                                 putBidPrice=putBidPrice, putAskPrice=putAskPrice)
+        self.index = 0
+
+    @classmethod
+    def fromChain(cls, chain: OptionChain, index: int) -> "OptionContract":
+        contract = cls.__new__(cls)
+        contract.chain = chain
+        contract.index = index
+        return contract
+
+    ticker = property(lambda self: self.chain.ticker)
+    expiration = property(lambda self: self.chain.expiration)
+    riskFreeRate = property(lambda self: self.chain.riskFreeRate)
+
+    strikePrice = chainColumn("strikePrice")
+    timeToMaturity = chainColumn("timeToMaturity")
+    bidPrice = chainColumn("bidPrice")
+    askPrice = chainColumn("askPrice")
+    callPrice = chainColumn("callPrice")
+    putPrice = chainColumn("putPrice")
+    volatilityRobinhood = chainColumn("volatilityRobinhood")
+    putBidPrice = chainColumn("putBidPrice")
+    putAskPrice = chainColumn("putAskPrice")
+
+    volatilityCallValue = chainColumn("volatilityCallValue")
+    volatilityPutValue = chainColumn("volatilityPutValue")
+    volatilityCallStatus = chainColumn("volatilityCallStatus")
+    volatilityPutStatus = chainColumn("volatilityPutStatus")
+    blackScholesCallValue = chainColumn("blackScholesCallValue")
+    blackScholesPutValue = chainColumn("blackScholesPutValue")
+    callFlags = chainColumn("callFlags")
+    putFlags = chainColumn("putFlags")
+
+    def blackScholesCalculation(self, S: float, sigma: float, optionType: str) -> float:
+        return blackScholesChain(S, self.strikePrice, self.timeToMaturity, self.riskFreeRate, sigma, optionType == 'call')
+
+    def modelPriceCalculation(self, S: float, sigma: float, optionType: str) -> float:
+        # Black-Scholes, or the American price when the chain is priced as American-style
+        return self.chain.modelPrice(S, self.strikePrice, self.timeToMaturity, sigma, optionType == 'call')
+
+    def impliedVolatilityCalculation(self, S:float, sigmaGuess: float | None, optionType: str) -> float:
+        if optionType == "call":
+            optionPrice = self.callPrice
+        elif optionType == "put":
+            optionPrice = self.putPrice
+
+        flags = self.callFlags if optionType == "call" else self.putFlags
+        if flags & self.chain.excludeFlags:
+            if optionType == "call":
+                self.volatilityCallStatus = IV_SCREENED
+            elif optionType == "put":
+                self.volatilityPutStatus = IV_SCREENED
+            return np.nan
+
+        result = self.chain.modelImpliedVolatility(
+            optionPrice if optionPrice is not None else np.nan,
+            S if S is not None else np.nan,
+            self.strikePrice,
+            self.timeToMaturity,
+            optionType == "call",
+            sigmaGuess
+        )
+        if optionType == "call":
+            self.volatilityCallStatus = int(result.status)
+        elif optionType == "put":
+            self.volatilityPutStatus = int(result.status)
+        return result.sigma
+
+    def lossCalculation(self, S:float, sigma: float, optionType: str) -> float:
+            
+        if optionType == "call":
+            optionPrice = self.callPrice
+        elif optionType == "put":
+            optionPrice = self.putPrice
+                
+        theoreticalPrice = self.blackScholesCalculation(S, sigma, optionType)
+        marketPrice = optionPrice
+            
+        return theoreticalPrice - marketPrice
+    
+    def getSharePrice(self, ticker: str) -> float:
+        return spotPriceCache.get(ticker)
+
+# === Utility/Calculation Functions ===
+def timeToMaturityCalc(expirationInput: str, asOf: datetime | None = None) -> float:
+    expirationDate = datetime.strptime(expirationInput, "%Y-%m-%d").date()
+    today = (asOf or datetime.today()).date()
+    daysToExpiration = (expirationDate - today).days
+    T = daysToExpiration / 365 # 252: Trading Days or 365: Standard
+    return max(T, 0)
@@ -0,0 +1,136 @@
+# === Import Libraries ===
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pricing import blackScholesChain, enableCompilationCache, impliedVolatilityChain
+
+# === Chain File Reading & Writing ===
+# Input rows use the replay format (see ReplayProvider.replayColumns): one quote per row.
+def fileFormat(path: str) -> str:
+    for suffix, name in ((".parquet", "parquet"), (".csv", "csv"), (".jsonl", "jsonl"), (".json", "jsonl")):
+        if path.endswith(suffix):
+            return name
+    raise ValueError(f"Unsupported file type: {path}")
+
+def readChunks(path: str, chunkSize: int):
+    fileType = fileFormat(path)
+    if fileType == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunkSize):
+            yield batch.to_pandas()
+    elif fileType == "csv":
+        yield from pd.read_csv(path, chunksize=chunkSize)
+    else:
+        yield from pd.read_json(path, lines=True, chunksize=chunkSize)
+
+class ResultWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.format = fileFormat(path)
+        self.parquetWriter = None
+        self.rows = 0
+        if self.format != "parquet":
+            self.file = open(path, "w")
+
+    def write(self, frame: pd.DataFrame):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.parquetWriter is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                self.parquetWriter = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=self.parquetWriter.schema, preserve_index=False)
+            self.parquetWriter.write_table(table)
+        elif self.format == "csv":
+            frame.to_csv(self.file, header=self.rows == 0, index=False)
+        else:
+            frame.to_json(self.file, orient="records", lines=True)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.parquetWriter is not None:
+            self.parquetWriter.close()
+        if self.format != "parquet":
+            self.file.close()
+
+# === Chunk Processing ===
+def processChunk(frame: pd.DataFrame, riskFreeRate: float) -> pd.DataFrame:
+    snapshotDate = pd.to_datetime(frame["snapshotTime"]).dt.normalize()
+    if snapshotDate.dt.tz is not None:
+        snapshotDate = snapshotDate.dt.tz_localize(None)
+    daysToExpiration = (pd.to_datetime(frame["expiration"]) - snapshotDate).dt.days.to_numpy(dtype=float)
+    timeToMaturity = np.maximum(daysToExpiration / 365, 0.0)
+
+    marketPrice = pd.to_numeric(frame["mark_price"], errors="coerce").to_numpy(dtype=float)
+    S = pd.to_numeric(frame["sharePrice"], errors="coerce").to_numpy(dtype=float)
+    K = pd.to_numeric(frame["strike_price"], errors="coerce").to_numpy(dtype=float)
+    isCall = (frame["optionType"] == "call").to_numpy()
+
+    result = impliedVolatilityChain(marketPrice, S, K, timeToMaturity, riskFreeRate, isCall)
+    modelPrice = blackScholesChain(S, K, timeToMaturity, riskFreeRate, result.sigma, isCall)
+
+    frame = frame.copy()
+    frame["timeToMaturity"] = timeToMaturity
+    frame["impliedVolatility"] = result.sigma
+    frame["impliedVolatilityStatus"] = result.status
+    frame["iterations"] = result.iterations
+    frame["blackScholesPrice"] = modelPrice
+    return frame
+
+def initWorker():
+    # Workers share the on-disk compilation cache, so only the first one compiles
+    enableCompilationCache()
+
+def processFile(inputPath: str, outputPath: str, chunkSize: int = 65536, workers: int = 1,
+                riskFreeRate: float = 0.05) -> int:
+    writer = ResultWriter(outputPath)
+    try:
+        if workers <= 1:
+            initWorker()
+            for frame in readChunks(inputPath, chunkSize):
+                writer.write(processChunk(frame, riskFreeRate))
+            return writer.rows
+
+        # Chunks are sharded across processes; at most two per worker are in flight
+        # and results are written back in input order
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initWorker) as pool:
+            pending = deque()
+            for frame in readChunks(inputPath, chunkSize):
+                pending.append(pool.submit(processChunk, frame, riskFreeRate))
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+        return writer.rows
+    finally:
+        writer.close()
+
+# === Command Line Entry Point ===
+def parseArguments(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solve implied volatility and reprice every quote in recorded chain files (CSV, Parquet or JSONL)."
+    )
+    parser.add_argument("input", help="Chain snapshot file in the replay format")
+    parser.add_argument("output", help="Result file; the extension picks the format")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Rows solved per batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes to shard chunks across")
+    parser.add_argument("--risk-free-rate", type=float, default=0.05)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parseArguments(argv)
+    start = time.perf_counter()
+    rows = processFile(args.input, args.output, args.chunk_size, args.workers, args.risk_free_rate)
+    print(f"Processed {rows} quotes in {time.perf_counter() - start:.2f}s -> {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
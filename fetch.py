@@ -0,0 +1,201 @@
+# === Import Libraries ===
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from chain import OptionChain, timeToMaturityCalc
+from providers import MarketDataProvider, RobinhoodProvider, getProvider
+from cache import sharedCache, spotPriceCache
+from surface import VolatilitySurface
+from screener import screenChains
+from snapshots import getSnapshotStore
+from metrics import metrics
+
+# === Chain Building Functions ===
+def buildOptionChain(ticker: str, expirationDate: str, calls: list, puts: list, asOf: datetime | None = None) -> OptionChain:
+    with metrics.timer("chainBuild"):
+        call_map = {float(opt['strike_price']): opt for opt in calls}
+        put_map = {float(opt['strike_price']): opt for opt in puts}
+
+        all_strikes = sorted(set(call_map.keys()) | set(put_map.keys()))
+
+        def quoteColumn(quotes: dict, field: str) -> list:
+            return [float(quotes[k][field]) if k in quotes and quotes[k][field] else None for k in all_strikes]
+
+        return OptionChain(
+            ticker=ticker,
+            expiration=expirationDate,
+            strikePrice=all_strikes,
+            timeToMaturity=timeToMaturityCalc(expirationDate, asOf),
+            bidPrice=quoteColumn(call_map, 'bid_price'),
+            askPrice=quoteColumn(call_map, 'ask_price'),
+            callPrice=quoteColumn(call_map, 'mark_price'),
+            putPrice=quoteColumn(put_map, 'mark_price'),
+            volatilityRobinhood=quoteColumn(call_map, 'implied_volatility'),
+            putBidPrice=quoteColumn(put_map, 'bid_price'),
+            putAskPrice=quoteColumn(put_map, 'ask_price')
+        )
+
+# === Chain Fetching Functions ===
+# Robinhood fetches go through robin_stocks' module-level requests session, so
+# connections are shared across threads once the pool is sized for them.
+sessionPoolSize = 0
+
+def sizeSessionPool(maxWorkers: int):
+    global sessionPoolSize
+    if maxWorkers <= sessionPoolSize:
+        return
+    from requests.adapters import HTTPAdapter
+    from robin_stocks.robinhood.helper import SESSION
+    SESSION.mount("https://", HTTPAdapter(pool_connections=maxWorkers, pool_maxsize=maxWorkers))
+    sessionPoolSize = maxWorkers
+
+def withRetries(request, attempts: int = 3, backoff: float = 0.5):
+    # robin_stocks reports most failures by returning None rather than raising
+    for attempt in range(attempts):
+        try:
+            result = request()
+            if result is not None:
+                return result
+            error = ValueError("Empty response")
+        except Exception as e:
+            error = e
+        if attempt < attempts - 1:
+            metrics.increment("fetch.retries")
+            time.sleep(backoff * 2**attempt)
+    raise error
+
+def fetchExpirations(tickers: list, maxWorkers: int = 8, provider: MarketDataProvider | None = None,
+                     attempts: int = 3, backoff: float = 0.5) -> dict:
+    provider = provider or getProvider()
+    expirations = {}
+    with ThreadPoolExecutor(max_workers=maxWorkers) as pool:
+        futures = {
+            pool.submit(withRetries, lambda t=ticker: provider.getExpirations(t), attempts, backoff): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                expirations[ticker] = list(future.result())
+            except Exception as e:
+                metrics.increment("fetch.errors")
+                print(f"Error fetching expirations for {ticker}: {e}")
+    return expirations
+
+def fetchOptionChains(tickers: list, expirations: dict | None = None, maxWorkers: int = 8,
+                      provider: MarketDataProvider | None = None, attempts: int = 3, backoff: float = 0.5,
+                      refreshSpot: bool = True) -> dict:
+    provider = provider or getProvider()
+    if isinstance(provider, RobinhoodProvider) and provider.usesRobinStocks:
+        sizeSessionPool(maxWorkers)
+    if expirations is None:
+        expirations = fetchExpirations(tickers, maxWorkers, provider, attempts, backoff)
+    asOf = provider.asOf()
+
+    def fetchSide(ticker: str, expirationDate: str, optionType: str) -> list:
+        with metrics.timer("fetch"):
+            return withRetries(
+                lambda: provider.getOptionQuotes(ticker, expirationDate, optionType),
+                attempts, backoff
+            )
+
+    # Calls and puts of every (ticker, expiration) are independent requests
+    with ThreadPoolExecutor(max_workers=maxWorkers) as pool:
+        # Spot for every ticker rides along as one batched quote request
+        spotRefresh = None
+        if refreshSpot and provider is spotPriceCache.currentProvider():
+            spotRefresh = pool.submit(spotPriceCache.refresh, tickers)
+        futures = {
+            (ticker, expirationDate): (
+                pool.submit(fetchSide, ticker, expirationDate, 'call'),
+                pool.submit(fetchSide, ticker, expirationDate, 'put')
+            )
+            for ticker in tickers
+            for expirationDate in expirations.get(ticker, [])
+        }
+
+        chains = {}
+        for (ticker, expirationDate), (calls, puts) in futures.items():
+            try:
+                chains[(ticker, expirationDate)] = buildOptionChain(ticker, expirationDate, calls.result(), puts.result(), asOf)
+            except Exception as e:
+                metrics.increment("fetch.errors")
+                print(f"Error fetching data for {ticker} {expirationDate}: {e}")
+
+        if spotRefresh is not None and spotRefresh.exception() is not None:
+            print(f"Error refreshing share prices: {spotRefresh.exception()}")
+    return chains
+
+def buildVolatilitySurface(ticker: str, surface: VolatilitySurface | None = None,
+                           provider: MarketDataProvider | None = None, maxWorkers: int = 8) -> VolatilitySurface:
+    # Refetches every listed expiration; only slices whose quotes moved are re-solved
+    surface = surface or VolatilitySurface(ticker)
+    chains = fetchOptionChains([ticker], maxWorkers=maxWorkers, provider=provider)
+    surface.build(chains, spotPriceCache.get(ticker))
+    return surface
+
+# === Shared Fetching Functions ===
+# Cached across sessions via sharedCache; keys are (kind, ticker, expiration, snapshot time).
+# Solved chains are also appended to the snapshot store, and a snapshot recent enough to
+# still be in the cache is loaded from there, so a restarted app skips the broker.
+def storeChains(chains, asOf: datetime | None):
+    store = getSnapshotStore()
+    if store is None:
+        return
+    try:
+        store.append(chains, asOf)
+    except Exception as e:
+        metrics.increment("snapshot.errors")
+        print(f"Error storing snapshot: {e}")
+
+def sharedExpirations(ticker: str, provider: MarketDataProvider | None = None) -> list:
+    provider = provider or getProvider()
+    key = ("expirations", ticker, None, provider.asOf())
+    return sharedCache.getOrCompute(key, lambda: fetchExpirations([ticker], 1, provider).get(ticker)) or []
+
+def sharedOptionChain(ticker: str, expirationDate: str, provider: MarketDataProvider | None = None) -> OptionChain | None:
+    provider = provider or getProvider()
+
+    def fetchAndSolve() -> OptionChain | None:
+        store = getSnapshotStore()
+        if store is not None:
+            stored = store.loadChains(ticker, provider.asOf(), sharedCache.ttl, [expirationDate]).get((ticker, expirationDate))
+            if stored is not None:
+                return stored
+        chain = fetchOptionChains([ticker], {ticker: [expirationDate]}, maxWorkers=2, provider=provider).get((ticker, expirationDate))
+        if chain is not None:
+            chain.solveImpliedVolatility()
+            storeChains([chain], provider.asOf())
+        return chain
+
+    # The cached chain is solved once for everyone; each caller gets its own copy to re-solve or stream into
+    chain = sharedCache.getOrCompute(("chain", ticker, expirationDate, provider.asOf()), fetchAndSolve)
+    return chain.copy() if chain is not None else None
+
+def sharedVolatilitySurface(ticker: str, provider: MarketDataProvider | None = None) -> VolatilitySurface:
+    # Surfaces are shared as-is and should be treated as read-only by callers
+    provider = provider or getProvider()
+
+    def loadOrBuild() -> VolatilitySurface:
+        store = getSnapshotStore()
+        if store is None:
+            return buildVolatilitySurface(ticker, provider=provider)
+        expirations = sharedExpirations(ticker, provider)
+        surface = store.loadSurface(ticker, provider.asOf(), sharedCache.ttl, expirations)
+        if surface is not None:
+            return surface
+
+        # Every side is solved (not just the surface's out-of-the-money one) so the
+        # stored snapshot carries full IVs and Greeks; the surface then reuses those IVs
+        chains = fetchOptionChains([ticker], {ticker: expirations}, provider=provider)
+        S = spotPriceCache.get(ticker)
+        for chain in screenChains(chains):
+            chain.solveImpliedVolatility(S)
+        storeChains(chains.values(), provider.asOf())
+        surface = VolatilitySurface(ticker)
+        if S is not None:
+            surface.loadSolved(chains, S)
+        return surface
+
+    key = ("surface", ticker, None, provider.asOf())
+    return sharedCache.getOrCompute(key, loadOrBuild)
@@ -0,0 +1,120 @@
+# === Import Libraries ===
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# === Metrics Registry ===
+# Process-wide stage timers and counters. Callbacks receive every observation as
+# (kind, name, value) with kind "timer" or "counter", so they can be forwarded to
+# any metrics backend; prometheusText() renders the same data for scraping.
+class Metrics:
+    def __init__(self, prefix: str = "options"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.callbacks = []
+
+    def addCallback(self, callback):
+        self.callbacks.append(callback)
+
+    def removeCallback(self, callback):
+        self.callbacks.remove(callback)
+
+    def notify(self, kind: str, name: str, value: float):
+        for callback in list(self.callbacks):
+            try:
+                callback(kind, name, value)
+            except Exception as e:
+                print(f"Metrics callback failed: {e}")
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            count, total, longest = self.timers.get(stage, (0, 0.0, 0.0))
+            self.timers[stage] = (count + 1, total + seconds, max(longest, seconds))
+        self.notify("timer", stage, seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.notify("counter", name, value)
+
+    def recordSolve(self, result, minSigma: float, maxSigma: float):
+        # Imported lazily to keep this module free of the pricing/JAX dependency
+        from pricing import IV_CONVERGED, IV_INVALID_INPUT, IV_LOW_VEGA, IV_MAX_ITERATIONS
+        status = np.asarray(result.status)
+        sigma = np.asarray(result.sigma)
+        solved = status != IV_INVALID_INPUT
+        self.increment("iv.contracts", int(status.size))
+        self.increment("iv.iterations", int(np.asarray(result.iterations).sum()))
+        self.increment("iv.converged", int((status == IV_CONVERGED).sum()))
+        self.increment("iv.notConverged", int((status == IV_MAX_ITERATIONS).sum()))
+        self.increment("iv.invalidInput", int((status == IV_INVALID_INPUT).sum()))
+        self.increment("iv.lowVega", int((status == IV_LOW_VEGA).sum()))
+        self.increment("iv.clippedSigma", int((solved & ((sigma <= minSigma * 1.001) | (sigma >= maxSigma * 0.999))).sum()))
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            timers = {
+                stage: {"calls": count, "totalSeconds": total, "meanSeconds": total / count, "maxSeconds": longest}
+                for stage, (count, total, longest) in self.timers.items()
+            }
+            return {"timers": timers, "counters": dict(self.counters)}
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def metricName(self, name: str) -> str:
+        snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in name).replace(".", "_")
+        return f"{self.prefix}_{snake}"
+
+    def prometheusText(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        stageMetrics = (
+            ("stage_calls_total", "counter", "calls"),
+            ("stage_seconds_total", "counter", "totalSeconds"),
+            ("stage_seconds_max", "gauge", "maxSeconds"),
+        )
+        for suffix, kind, field in stageMetrics:
+            name = f"{self.prefix}_{suffix}"
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, values in sorted(snapshot["timers"].items()):
+                lines.append(f'{name}{{stage="{stage}"}} {values[field]}')
+        for counter, value in sorted(snapshot["counters"].items()):
+            name = self.metricName(counter) + "_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def serveMetrics(port: int = 9100, registry: Metrics = metrics) -> ThreadingHTTPServer:
+    # Minimal /metrics endpoint for Prometheus scraping, served from a daemon thread
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.prometheusText().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,385 @@
+# === Import Libraries ===
+import os
+from functools import partial
+from typing import NamedTuple
+import jax
+import jax.numpy as jnp
+import numpy as np
+from jax import lax
+from jax.scipy.stats import norm
+from metrics import metrics
+
+# === Solver Status Codes ===
+IV_CONVERGED = 0
+IV_MAX_ITERATIONS = 1
+IV_INVALID_INPUT = 2
+IV_SCREENED = 3 # Set by chain screening before solving, never by the solver itself
+IV_LOW_VEGA = 4 # Reprices within epsilon, but with too little vega (time value) to pin sigma down
+
+class Greeks(NamedTuple):
+    price: jnp.ndarray
+    delta: jnp.ndarray
+    gamma: jnp.ndarray
+    vega: jnp.ndarray
+    theta: jnp.ndarray
+    rho: jnp.ndarray
+    vanna: jnp.ndarray
+    volga: jnp.ndarray
+
+class ImpliedVolatilityResult(NamedTuple):
+    sigma: jnp.ndarray
+    status: jnp.ndarray
+    iterations: jnp.ndarray
+
+# === Vectorized Pricing Functions ===
+# All inputs broadcast against each other, so a single strike, a whole chain
+# (1-D) or a stack of chains (expirations x strikes) price in one compiled call.
+@jax.jit
+def blackScholesCallPut(S, K, T, riskFreeRate, sigma):
+    S, K, T, riskFreeRate, sigma = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float)
+    )
+    discountedStrike = K * jnp.exp(-riskFreeRate * T)
+
+    # Expired or zero-vol contracts are worth their (discounted) intrinsic value; a NaN
+    # sigma (unsolved or screened out) has no price rather than an intrinsic one
+    live = (T > 0) & (sigma > 0)
+    safeT = jnp.where(live, T, 1.0)
+    safeSigma = jnp.where(live, sigma, 1.0)
+    sigmaRootT = safeSigma * jnp.sqrt(safeT)
+
+    d1 = (jnp.log(S / K) + (riskFreeRate + 0.5 * safeSigma**2) * safeT) / sigmaRootT
+    d2 = d1 - sigmaRootT
+    callValue = S * norm.cdf(d1) - discountedStrike * norm.cdf(d2)
+    putValue = discountedStrike * norm.cdf(-d2) - S * norm.cdf(-d1)
+
+    callIntrinsic = jnp.maximum(S - discountedStrike, 0.0)
+    putIntrinsic = jnp.maximum(discountedStrike - S, 0.0)
+
+    unpriced = (T > 0) & jnp.isnan(sigma)
+    callValue = jnp.where(live, callValue, jnp.where(unpriced, jnp.nan, callIntrinsic))
+    putValue = jnp.where(live, putValue, jnp.where(unpriced, jnp.nan, putIntrinsic))
+    return callValue, putValue
+
+@jax.jit
+def blackScholesBatch(S, K, T, riskFreeRate, sigma, isCall):
+    callValue, putValue = blackScholesCallPut(S, K, T, riskFreeRate, sigma)
+    return jnp.where(isCall, callValue, putValue)
+
+@jax.jit
+def blackScholesVega(S, K, T, riskFreeRate, sigma):
+    S, K, T, riskFreeRate, sigma = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float)
+    )
+    live = (T > 0) & (sigma > 0)
+    safeT = jnp.where(live, T, 1.0)
+    safeSigma = jnp.where(live, sigma, 1.0)
+    rootT = jnp.sqrt(safeT)
+
+    d1 = (jnp.log(S / K) + (riskFreeRate + 0.5 * safeSigma**2) * safeT) / (safeSigma * rootT)
+    return jnp.where(live, S * norm.pdf(d1) * rootT, 0.0)
+
+# === Vectorized Greeks Functions ===
+@jax.jit
+def blackScholesGreeks(S, K, T, riskFreeRate, sigma, isCall) -> Greeks:
+    S, K, T, riskFreeRate, sigma, isCall = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float),
+        jnp.asarray(isCall, dtype=bool)
+    )
+    live = (T > 0) & (sigma > 0)
+    safeT = jnp.where(live, T, 1.0)
+    safeSigma = jnp.where(live, sigma, 1.0)
+    rootT = jnp.sqrt(safeT)
+    sigmaRootT = safeSigma * rootT
+
+    d1 = (jnp.log(S / K) + (riskFreeRate + 0.5 * safeSigma**2) * safeT) / sigmaRootT
+    d2 = d1 - sigmaRootT
+    density = norm.pdf(d1)
+    discountedStrike = K * jnp.exp(-riskFreeRate * safeT)
+    sign = jnp.where(isCall, 1.0, -1.0)
+
+    # Closed forms per unit of underlying, with theta per year and vega/rho per 1.00 move
+    delta = jnp.where(isCall, norm.cdf(d1), norm.cdf(d1) - 1.0)
+    gamma = density / (S * sigmaRootT)
+    vega = S * density * rootT
+    theta = -S * density * safeSigma / (2 * rootT) - sign * riskFreeRate * discountedStrike * norm.cdf(sign * d2)
+    rho = sign * discountedStrike * safeT * norm.cdf(sign * d2)
+    vanna = -density * d2 / safeSigma
+    volga = vega * d1 * d2 / safeSigma
+
+    # Expired or zero-vol contracts only keep the intrinsic delta; a NaN sigma (unsolved or
+    # screened out) has no Greeks at all
+    inTheMoney = jnp.where(isCall, S > K * jnp.exp(-riskFreeRate * T), S < K * jnp.exp(-riskFreeRate * T))
+    zero = jnp.where((T > 0) & jnp.isnan(sigma), jnp.nan, jnp.zeros_like(S))
+    return Greeks(
+        price=blackScholesBatch(S, K, T, riskFreeRate, sigma, isCall),
+        delta=jnp.where(live, delta, jnp.where(inTheMoney, sign, 0.0) + zero),
+        gamma=jnp.where(live, gamma, zero),
+        vega=jnp.where(live, vega, zero),
+        theta=jnp.where(live, theta, zero),
+        rho=jnp.where(live, rho, zero),
+        vanna=jnp.where(live, vanna, zero),
+        volga=jnp.where(live, volga, zero)
+    )
+
+def autodiffGreeks(pricingFunction, S, K, T, riskFreeRate, sigma, isCall) -> Greeks:
+    # For models without closed forms. Pricing is elementwise, so a forward-mode
+    # pass with a tangent of ones gives the diagonal of jacfwd in one sweep.
+    S, K, T, riskFreeRate, sigma, isCall = jnp.broadcast_arrays(
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(sigma, dtype=float),
+        jnp.asarray(isCall, dtype=bool)
+    )
+    ones = jnp.ones_like(S)
+
+    def price(S, T, riskFreeRate, sigma):
+        return pricingFunction(S, K, T, riskFreeRate, sigma, isCall)
+
+    def firstOrder(argnum):
+        def derivative(*args):
+            tangents = [ones if i == argnum else jnp.zeros_like(a) for i, a in enumerate(args)]
+            return jax.jvp(price, args, tuple(tangents))[1]
+        return derivative
+
+    def secondOrder(outer, inner):
+        def derivative(*args):
+            tangents = [ones if i == outer else jnp.zeros_like(a) for i, a in enumerate(args)]
+            return jax.jvp(firstOrder(inner), args, tuple(tangents))[1]
+        return derivative
+
+    args = (S, T, riskFreeRate, sigma)
+    return Greeks(
+        price=price(*args),
+        delta=firstOrder(0)(*args),
+        gamma=secondOrder(0, 0)(*args),
+        vega=firstOrder(3)(*args),
+        theta=-firstOrder(1)(*args),
+        rho=firstOrder(2)(*args),
+        vanna=secondOrder(0, 3)(*args),
+        volga=secondOrder(3, 3)(*args)
+    )
+
+def aggregateGreeks(greeks: Greeks, quantity, multiplier: float = 100.0) -> dict:
+    # Position-weighted totals for a book; quantity broadcasts against the Greeks
+    weight = jnp.asarray(quantity, dtype=float) * multiplier
+    return {name: float(jnp.nansum(weight * value)) for name, value in greeks._asdict().items()}
+
+# === Vectorized Implied Volatility Functions ===
+def noArbitrageBounds(S, K, T, riskFreeRate, isCall):
+    discountedStrike = K * jnp.exp(-riskFreeRate * T)
+    lowerBound = jnp.where(isCall, jnp.maximum(S - discountedStrike, 0.0), jnp.maximum(discountedStrike - S, 0.0))
+    upperBound = jnp.where(isCall, S, discountedStrike)
+    return lowerBound, upperBound
+
+@jax.jit
+def impliedVolatilityGuess(marketPrice, S, K, T, riskFreeRate, isCall):
+    marketPrice, S, K, T, riskFreeRate, isCall = jnp.broadcast_arrays(
+        jnp.asarray(marketPrice, dtype=float),
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(isCall, dtype=bool)
+    )
+    discountedStrike = K * jnp.exp(-riskFreeRate * T)
+    safeT = jnp.where(T > 0, T, 1.0)
+
+    # Corrado-Miller works on call prices, so map puts across via put-call parity
+    callPrice = jnp.where(isCall, marketPrice, marketPrice + S - discountedStrike)
+    moneyness = S - discountedStrike
+    centered = callPrice - 0.5 * moneyness
+    discriminant = centered**2 - moneyness**2 / jnp.pi
+    scale = jnp.sqrt(2 * jnp.pi / safeT) / (S + discountedStrike)
+    corradoMiller = scale * (centered + jnp.sqrt(jnp.maximum(discriminant, 0.0)))
+
+    # Brenner-Subrahmanyam (ATM) whenever the Corrado-Miller root is undefined
+    brennerSubrahmanyam = jnp.sqrt(2 * jnp.pi / safeT) * callPrice / S
+    closedForm = jnp.where(discriminant >= 0, corradoMiller, brennerSubrahmanyam)
+
+    # Both are poor far from the money, so keep whichever of them, the Manaster-Koehler
+    # inflection point or a flat 30% reprices the quote best. This only saves iterations:
+    # accuracy comes from the solver's vol-space convergence test, not from the seed.
+    inflection = jnp.sqrt(2 * jnp.abs(jnp.log(S / K) + riskFreeRate * safeT) / safeT)
+    candidates = jnp.stack([jnp.clip(jnp.nan_to_num(closedForm, nan=0.3), 1e-4, 5.0),
+                            jnp.clip(inflection, 1e-4, 5.0),
+                            jnp.full_like(S, 0.3)])
+    pricingError = jnp.abs(blackScholesBatch(S, K, T, riskFreeRate, candidates, isCall) - marketPrice)
+    best = jnp.argmin(jnp.nan_to_num(pricingError, nan=jnp.inf), axis=0)
+    return jnp.take_along_axis(candidates, best[jnp.newaxis], axis=0)[0]
+
+@partial(jax.jit, static_argnames=("maxIterations", "pricingModel"))
+def impliedVolatilityBatch(marketPrice, S, K, T, riskFreeRate, isCall,
+                           sigmaGuess=None, maxIterations: int = 20, epsilon: float = 0.001,
+                           minSigma: float = 1e-4, maxSigma: float = 5.0, pricingModel=None,
+                           sigmaTolerance: float = 1e-3) -> ImpliedVolatilityResult:
+    # pricingModel swaps Black-Scholes for any hashable model(S, K, T, riskFreeRate, sigma, isCall),
+    # e.g. american.BinomialModel; its vega comes from forward-mode autodiff
+    # Missing guesses (None, or NaN entries when warm-starting) fall back to the closed form
+    # Converged means within epsilon in price and within sigmaTolerance in vol (error / vega,
+    # with float rounding of the price counted as error), so a quote with no time value is not
+    # "solved" by whichever sigma it was seeded at
+    closedFormGuess = impliedVolatilityGuess(marketPrice, S, K, T, riskFreeRate, isCall)
+    if sigmaGuess is None:
+        sigmaGuess = closedFormGuess
+    sigmaGuess = jnp.where(jnp.isfinite(sigmaGuess), sigmaGuess, closedFormGuess)
+
+    marketPrice, S, K, T, riskFreeRate, isCall, sigmaGuess = jnp.broadcast_arrays(
+        jnp.asarray(marketPrice, dtype=float),
+        jnp.asarray(S, dtype=float),
+        jnp.asarray(K, dtype=float),
+        jnp.asarray(T, dtype=float),
+        jnp.asarray(riskFreeRate, dtype=float),
+        jnp.asarray(isCall, dtype=bool),
+        jnp.asarray(sigmaGuess, dtype=float)
+    )
+
+    # Prices outside the no-arbitrage band have no Black-Scholes volatility
+    lowerBound, upperBound = noArbitrageBounds(S, K, T, riskFreeRate, isCall)
+    if pricingModel is not None:
+        # An American put can be worth up to the undiscounted strike
+        upperBound = jnp.where(isCall, S, K)
+    valid = (jnp.isfinite(marketPrice) & jnp.isfinite(S) & (S > 0) & (K > 0) & (T > 0)
+             & (marketPrice > lowerBound - epsilon) & (marketPrice < upperBound))
+
+    sigma = jnp.where(valid, jnp.clip(jnp.nan_to_num(sigmaGuess, nan=0.5), minSigma, maxSigma), jnp.nan)
+    low = jnp.full(sigma.shape, minSigma)
+    high = jnp.full(sigma.shape, maxSigma)
+    status = jnp.where(valid, IV_MAX_ITERATIONS, IV_INVALID_INPUT)
+    iterations = jnp.zeros(sigma.shape, dtype=jnp.int32)
+    roundingError = 4 * jnp.finfo(S.dtype).eps * (S + K)
+
+    def pricingError(sigma):
+        if pricingModel is None:
+            return blackScholesBatch(S, K, T, riskFreeRate, sigma, isCall) - marketPrice
+        return pricingModel(S, K, T, riskFreeRate, sigma, isCall) - marketPrice
+
+    def errorAndVega(sigma):
+        if pricingModel is None:
+            return pricingError(sigma), blackScholesVega(S, K, T, riskFreeRate, sigma)
+        return jax.jvp(pricingError, (sigma,), (jnp.ones_like(sigma),))
+
+    def keepIterating(state):
+        i, sigma, low, high, status, iterations, active = state
+        return (i < maxIterations) & jnp.any(active)
+
+    def safeguardedNewtonStep(state):
+        i, sigma, low, high, status, iterations, active = state
+        safeSigma = jnp.where(active, sigma, 1.0)
+        error, vega = errorAndVega(safeSigma)
+
+        converged = active & (jnp.abs(error) < epsilon) & (jnp.abs(error) + roundingError < sigmaTolerance * vega)
+        stepping = active & ~converged
+
+        # Price is increasing in sigma, so the sign of the error shrinks the bracket
+        high = jnp.where(stepping & (error > 0), safeSigma, high)
+        low = jnp.where(stepping & (error <= 0), safeSigma, low)
+
+        # Bisect wherever Newton is flat or would leave the bracket
+        newtonSigma = safeSigma - error / jnp.where(vega > 1e-8, vega, 1.0)
+        inBracket = (vega > 1e-8) & (newtonSigma > low) & (newtonSigma < high)
+        nextSigma = jnp.where(inBracket, newtonSigma, 0.5 * (low + high))
+
+        sigma = jnp.where(stepping, nextSigma, sigma)
+        status = jnp.where(converged, IV_CONVERGED, status)
+        iterations = iterations + stepping.astype(jnp.int32)
+        return i + 1, sigma, low, high, status, iterations, stepping
+
+    _, sigma, low, high, status, iterations, active = lax.while_loop(
+        keepIterating, safeguardedNewtonStep, (0, sigma, low, high, status, iterations, valid)
+    )
+
+    # Elements still active took their last step without a convergence check; those that
+    # reprice within epsilon but never pinned sigma down are low-vega rather than unsolved
+    finalError, finalVega = errorAndVega(jnp.where(active, sigma, 1.0))
+    priced = active & (jnp.abs(finalError) < epsilon)
+    status = jnp.where(priced & (jnp.abs(finalError) + roundingError < sigmaTolerance * finalVega), IV_CONVERGED,
+                       jnp.where(priced, IV_LOW_VEGA, status))
+    return ImpliedVolatilityResult(sigma, status, iterations)
+
+# === Compilation Cache & Warm-Up ===
+# jit compiles once per input shape, so chains are padded up to bucket lengths
+# (64, 256, 1024, ...) and every chain size in a bucket reuses the same executable.
+def enableCompilationCache(cacheDirectory: str | None = None):
+    cacheDirectory = cacheDirectory or os.getenv("JAX_CACHE_DIR") or os.path.expanduser("~/.cache/options-pricing/jax")
+    os.makedirs(cacheDirectory, exist_ok=True)
+    jax.config.update("jax_compilation_cache_dir", cacheDirectory)
+    jax.config.update("jax_persistent_cache_min_compile_time_secs", 0.0)
+    jax.config.update("jax_persistent_cache_min_entry_size_bytes", 0)
+
+def bucketLength(n: int, minimum: int = 64, growth: int = 4) -> int:
+    length = minimum
+    while length < n:
+        length *= growth
+    return length
+
+def callBucketed(function, args: tuple, fills: tuple, **kwargs):
+    arrays = np.broadcast_arrays(*[np.asarray(a) for a in args])
+    shape, n = arrays[0].shape, arrays[0].size
+    length = bucketLength(n)
+    padded = [
+        np.concatenate([a.ravel(), np.full(length - n, fill, dtype=a.dtype)])
+        for a, fill in zip(arrays, fills)
+    ]
+    result = function(*padded, **kwargs)
+    # Unpad on the host so slicing does not compile a kernel per chain length
+    return jax.tree_util.tree_map(lambda value: np.asarray(value)[:n].reshape(shape), result)
+
+# Padding rows are valid, cheap contracts (or NaN quotes the solver skips outright)
+pricingFills = (1.0, 1.0, 1.0, 0.0, 0.2, True)
+solverFills = (np.nan, 1.0, 1.0, 1.0, 0.0, True)
+
+def blackScholesChain(S, K, T, riskFreeRate, sigma, isCall):
+    args = (np.asarray(S, dtype=float), np.asarray(K, dtype=float), np.asarray(T, dtype=float),
+            np.asarray(riskFreeRate, dtype=float), np.asarray(sigma, dtype=float), np.asarray(isCall, dtype=bool))
+    with metrics.timer("repricing"):
+        return callBucketed(blackScholesBatch, args, pricingFills)
+
+def blackScholesGreeksChain(S, K, T, riskFreeRate, sigma, isCall) -> Greeks:
+    args = (np.asarray(S, dtype=float), np.asarray(K, dtype=float), np.asarray(T, dtype=float),
+            np.asarray(riskFreeRate, dtype=float), np.asarray(sigma, dtype=float), np.asarray(isCall, dtype=bool))
+    with metrics.timer("greeks"):
+        return callBucketed(blackScholesGreeks, args, pricingFills)
+
+def impliedVolatilityChain(marketPrice, S, K, T, riskFreeRate, isCall, sigmaGuess=None, **kwargs) -> ImpliedVolatilityResult:
+    args = (np.asarray(marketPrice, dtype=float), np.asarray(S, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(T, dtype=float), np.asarray(riskFreeRate, dtype=float), np.asarray(isCall, dtype=bool))
+    with metrics.timer("ivSolve"):
+        if sigmaGuess is None:
+            result = callBucketed(impliedVolatilityBatch, args, solverFills, **kwargs)
+        else:
+            result = callBucketed(impliedVolatilityBatch, args + (np.asarray(sigmaGuess, dtype=float),), solverFills + (0.5,), **kwargs)
+    metrics.recordSolve(result, kwargs.get("minSigma", 1e-4), kwargs.get("maxSigma", 5.0))
+    return result
+
+def warmUp(maxLength: int = 4096):
+    # Compiles (or loads from the persistent cache) every bucket the app will hit
+    lengths = [bucketLength(1)]
+    while lengths[-1] < maxLength:
+        lengths.append(bucketLength(lengths[-1] + 1))
+    for length in lengths:
+        S, K, T = np.full(length, 100.0), np.full(length, 100.0), np.full(length, 0.5)
+        riskFreeRate, sigma, isCall = np.full(length, 0.05), np.full(length, 0.2), np.full(length, True)
+        price = blackScholesBatch(S, K, T, riskFreeRate, sigma, isCall)
+        blackScholesGreeks(S, K, T, riskFreeRate, sigma, isCall)
+        impliedVolatilityBatch(price, S, K, T, riskFreeRate, isCall)
+        impliedVolatilityBatch(price, S, K, T, riskFreeRate, isCall, sigma)
+        jax.block_until_ready(price)
+
+    # American exercise is a checkbox away, so its lattice kernels are compiled up front too
+    from american import warmUpLattice
+    warmUpLattice(lengths)
@@ -0,0 +1,198 @@
+# === Import Libraries ===
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from datetime import datetime
+
+# === Market Data Providers ===
+# Providers hand back option quotes as robin_stocks-shaped dicts
+# ('strike_price', 'mark_price', 'bid_price', 'ask_price', 'implied_volatility'),
+# so chain building does not care where the data came from. A provider missing any
+# of the abstract methods fails when it is constructed, not mid-fetch.
+class MarketDataProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def getExpirations(self, ticker: str) -> list:
+        ...
+
+    @abstractmethod
+    def getOptionQuotes(self, ticker: str, expirationDate: str, optionType: str) -> list:
+        ...
+
+    @abstractmethod
+    def getSharePrice(self, ticker: str) -> float | None:
+        ...
+
+    def getSharePrices(self, tickers: list) -> dict:
+        return {ticker: self.getSharePrice(ticker) for ticker in tickers}
+
+    def asOf(self) -> datetime | None:
+        # Live providers price against today; replay prices against the snapshot time
+        return None
+
+class RobinhoodProvider(MarketDataProvider):
+    name = "robinhood"
+
+    def __init__(self, optionsClient=None, stocksClient=None):
+        # Only the real robin_stocks modules go through its shared requests SESSION;
+        # injected stand-ins never touch it
+        self.usesRobinStocks = optionsClient is None or stocksClient is None
+        if self.usesRobinStocks:
+            import robin_stocks.robinhood as r
+            optionsClient = optionsClient or r.options
+            stocksClient = stocksClient or r.stocks
+        self.optionsClient = optionsClient
+        self.stocksClient = stocksClient
+
+    def getExpirations(self, ticker: str) -> list:
+        chain = self.optionsClient.get_chains(ticker)
+        return list(chain['expiration_dates']) if chain else None
+
+    def getOptionQuotes(self, ticker: str, expirationDate: str, optionType: str) -> list:
+        return self.optionsClient.find_options_by_expiration(ticker, expirationDate, optionType=optionType)
+
+    def getSharePrice(self, ticker: str) -> float | None:
+        price = self.stocksClient.get_latest_price(ticker, includeExtendedHours=False)
+        return float(price[0]) if price and price[0] else None
+
+    def getSharePrices(self, tickers: list) -> dict:
+        # get_latest_price accepts a list and quotes every ticker in one request
+        prices = self.stocksClient.get_latest_price(list(tickers), includeExtendedHours=False) or []
+        return {ticker: float(price) if price else None for ticker, price in zip(tickers, prices)}
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def __init__(self, chainTTL: float = 30.0):
+        import yfinance as yf
+        self.yf = yf
+        self.chainTTL = chainTTL
+        self.chainCache = {}
+        self.lock = threading.Lock()
+
+    def getExpirations(self, ticker: str) -> list:
+        return list(self.yf.Ticker(ticker).options)
+
+    def getOptionQuotes(self, ticker: str, expirationDate: str, optionType: str) -> list:
+        # yfinance returns both sides in one download, so keep it briefly for the other side
+        key = (ticker, expirationDate)
+        with self.lock:
+            fetchedAt, optionChain = self.chainCache.get(key, (0.0, None))
+        if optionChain is None or time.monotonic() - fetchedAt > self.chainTTL:
+            optionChain = self.yf.Ticker(ticker).option_chain(expirationDate)
+            with self.lock:
+                self.chainCache[key] = (time.monotonic(), optionChain)
+
+        frame = optionChain.calls if optionType == 'call' else optionChain.puts
+        quotes = []
+        for row in frame.itertuples(index=False):
+            hasMarket = row.bid > 0 and row.ask > 0
+            quotes.append({
+                'strike_price': row.strike,
+                'mark_price': (row.bid + row.ask) / 2 if hasMarket else row.lastPrice,
+                'bid_price': row.bid if hasMarket else None,
+                'ask_price': row.ask if hasMarket else None,
+                'implied_volatility': row.impliedVolatility
+            })
+        return quotes
+
+    def getSharePrice(self, ticker: str) -> float | None:
+        price = self.yf.Ticker(ticker).fast_info.get('last_price')
+        return float(price) if price else None
+
+class ReplayProvider(MarketDataProvider):
+    # Replays recorded quotes one snapshot at a time. Files hold one row per quote
+    # with the columns in replayColumns, ordered by snapshotTime; only the current
+    # snapshot is ever held in memory.
+    name = "replay"
+    replayColumns = ("snapshotTime", "ticker", "expiration", "optionType", "strike_price",
+                     "mark_price", "bid_price", "ask_price", "implied_volatility", "sharePrice")
+
+    def __init__(self, path: str, batchSize: int = 65536):
+        self.path = str(path)
+        self.batchSize = batchSize
+        self.stream = self.snapshots()
+        self.snapshotTime = None
+        self.quotes = {}
+        self.sharePrices = {}
+        self.advance()
+
+    def rows(self):
+        if self.path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=self.batchSize):
+                yield from batch.to_pylist()
+        else:
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def snapshots(self):
+        snapshotTime, rows = None, []
+        for row in self.rows():
+            if rows and row['snapshotTime'] != snapshotTime:
+                yield snapshotTime, rows
+                rows = []
+            snapshotTime = row['snapshotTime']
+            rows.append(row)
+        if rows:
+            yield snapshotTime, rows
+
+    def advance(self) -> bool:
+        try:
+            snapshotTime, rows = next(self.stream)
+        except StopIteration:
+            return False
+
+        quotes, sharePrices = {}, {}
+        for row in rows:
+            quotes.setdefault((row['ticker'], row['expiration'], row['optionType']), []).append(row)
+            if row.get('sharePrice') is not None:
+                sharePrices[row['ticker']] = float(row['sharePrice'])
+        self.snapshotTime, self.quotes, self.sharePrices = snapshotTime, quotes, sharePrices
+        return True
+
+    def getExpirations(self, ticker: str) -> list:
+        return sorted({expiration for t, expiration, _ in self.quotes if t == ticker})
+
+    def getOptionQuotes(self, ticker: str, expirationDate: str, optionType: str) -> list:
+        return self.quotes.get((ticker, expirationDate, optionType), [])
+
+    def getSharePrice(self, ticker: str) -> float | None:
+        return self.sharePrices.get(ticker)
+
+    def asOf(self) -> datetime | None:
+        if self.snapshotTime is None:
+            return None
+        if isinstance(self.snapshotTime, datetime):
+            return self.snapshotTime
+        return datetime.fromisoformat(str(self.snapshotTime))
+
+def recordSnapshot(path: str, provider: MarketDataProvider, tickers: list, snapshotTime: datetime | None = None):
+    snapshotTime = (snapshotTime or datetime.now()).isoformat()
+    with open(path, "a") as f:
+        for ticker in tickers:
+            sharePrice = provider.getSharePrice(ticker)
+            for expirationDate in provider.getExpirations(ticker) or []:
+                for optionType in ('call', 'put'):
+                    for quote in provider.getOptionQuotes(ticker, expirationDate, optionType) or []:
+                        row = {column: quote.get(column) for column in ReplayProvider.replayColumns}
+                        row.update(snapshotTime=snapshotTime, ticker=ticker, expiration=expirationDate,
+                                   optionType=optionType, sharePrice=sharePrice)
+                        f.write(json.dumps(row) + "\n")
+
+# === Active Provider ===
+activeProvider = None
+
+def getProvider() -> MarketDataProvider:
+    global activeProvider
+    if activeProvider is None:
+        activeProvider = RobinhoodProvider()
+    return activeProvider
+
+def setProvider(provider: MarketDataProvider):
+    global activeProvider
+    activeProvider = provider
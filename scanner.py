@@ -0,0 +1,127 @@
+# === Import Libraries ===
+import numpy as np
+import pandas as pd
+from pricing import IV_CONVERGED, blackScholesChain, impliedVolatilityChain
+from screener import FLAG_OUTSIDE_QUOTE, FLAG_STALE, describeFlags, screenChains
+from cache import SharedCache, spotPriceCache
+from fetch import fetchExpirations, fetchOptionChains
+from providers import MarketDataProvider, getProvider
+
+# === Smile Model ===
+# Without a surface, each expiration's model volatility is a spread-weighted quadratic
+# in log-moneyness fitted to the out-of-the-money mid IVs, so a contract's edge is its
+# distance from a smooth smile rather than from its own quote.
+def fitSmile(logMoneyness: np.ndarray, totalVariance: np.ndarray, weight: np.ndarray, degree: int = 2) -> np.ndarray | None:
+    if len(logMoneyness) <= degree:
+        return None
+    coefficients = np.polyfit(logMoneyness, totalVariance, degree, w=weight)
+
+    # Refit without the quotes far off the first smile so a mispricing cannot bend it towards itself
+    residual = np.abs(np.polyval(coefficients, logMoneyness) - totalVariance)
+    inliers = residual <= 3 * np.median(residual)
+    if degree < inliers.sum() < len(inliers):
+        coefficients = np.polyfit(logMoneyness[inliers], totalVariance[inliers], degree, w=weight[inliers])
+    return coefficients
+
+def smileVolatility(groups: np.ndarray, logMoneyness: np.ndarray, T: np.ndarray, midSigma: np.ndarray,
+                    volatilitySpread: np.ndarray, fitRows: np.ndarray) -> np.ndarray:
+    modelSigma = np.full(len(groups), np.nan)
+    for group in np.unique(groups):
+        rows = groups == group
+        fit = rows & fitRows
+        coefficients = fitSmile(logMoneyness[fit], midSigma[fit]**2 * T[fit], 1 / np.maximum(volatilitySpread[fit], 1e-3))
+        if coefficients is not None:
+            totalVariance = np.maximum(np.polyval(coefficients, logMoneyness[rows]), 0.0)
+            modelSigma[rows] = np.sqrt(totalVariance / T[rows])
+    return modelSigma
+
+# === Mispricing Scanner ===
+def scanChains(chains, spotPrices: dict | float, topN: int = 25, surfaces: dict | None = None,
+               excludeFlags: int = FLAG_STALE | FLAG_OUTSIDE_QUOTE) -> pd.DataFrame:
+    # Solves bid, mid and ask IV for both sides of every contract in one batch, then
+    # ranks contracts by model-vs-market edge net of the spread they would have to cross.
+    # Arbitrage flags are reported rather than excluded, since they are edge too; only
+    # unusable quotes (excludeFlags) are left out.
+    chains = [c for c in screenChains(chains) if len(c)]
+    if not isinstance(spotPrices, dict):
+        spotPrices = {c.ticker: spotPrices for c in chains}
+    chains = [c for c in chains if spotPrices.get(c.ticker) is not None]
+
+    columns = {name: [] for name in ("group", "S", "K", "T", "riskFreeRate", "isCall", "bid", "ask", "mark", "flags")}
+    for group, chain in enumerate(chains):
+        for isCall, bid, ask, mark, flags in ((True, chain.bidPrice, chain.askPrice, chain.callPrice, chain.callFlags),
+                                              (False, chain.putBidPrice, chain.putAskPrice, chain.putPrice, chain.putFlags)):
+            for name, values in (("group", group), ("S", spotPrices[chain.ticker]), ("K", chain.strikePrice),
+                                 ("T", chain.timeToMaturity), ("riskFreeRate", chain.riskFreeRate), ("isCall", isCall),
+                                 ("bid", bid), ("ask", ask), ("mark", mark), ("flags", flags)):
+                columns[name].append(np.broadcast_to(values, (len(chain),)))
+    if not chains:
+        return pd.DataFrame()
+    group, S, K, T, riskFreeRate, isCall, bid, ask, mark, flags = (np.concatenate(columns[name]) for name in columns)
+
+    scanned = (bid > 0) & (ask >= bid) & ((flags & excludeFlags) == 0)
+    mid = (bid + ask) / 2
+    quotes = np.where(scanned, np.stack([bid, mid, ask]), np.nan)
+    result = impliedVolatilityChain(quotes, S, K, T, riskFreeRate, isCall)
+    bidSigma, midSigma, askSigma = np.asarray(result.sigma)
+    midConverged = np.asarray(result.status)[1] == IV_CONVERGED
+
+    forward = S * np.exp(riskFreeRate * T)
+    logMoneyness = np.log(K / forward)
+    if surfaces:
+        modelSigma = np.full(len(K), np.nan)
+        tickers = np.array([chains[g].ticker for g in group])
+        for ticker, surface in surfaces.items():
+            rows = tickers == ticker
+            modelSigma[rows] = surface.impliedVolatility(logMoneyness[rows], T[rows])
+    else:
+        outOfTheMoney = np.where(isCall, K >= forward, K < forward)
+        volatilitySpread = np.where(np.isfinite(askSigma - bidSigma), askSigma - bidSigma, 1.0)
+        modelSigma = smileVolatility(group, logMoneyness, T, midSigma, volatilitySpread, midConverged & outOfTheMoney)
+
+    modelPrice = np.asarray(blackScholesChain(S, K, T, riskFreeRate, modelSigma, isCall))
+    buyEdge = modelPrice - ask
+    sellEdge = bid - modelPrice
+    netEdge = np.maximum(buyEdge, sellEdge)
+    # Slices too thin to fit a smile (or outside a surface) have no model vol and no edge
+    ranked = np.flatnonzero(scanned & midConverged & np.isfinite(modelSigma) & np.isfinite(netEdge))
+    ranked = ranked[np.argsort(-netEdge[ranked], kind="stable")][:topN]
+
+    return pd.DataFrame({
+        "ticker": [chains[g].ticker for g in group[ranked]],
+        "expiration": [chains[g].expiration for g in group[ranked]],
+        "strikePrice": K[ranked],
+        "optionType": np.where(isCall[ranked], "call", "put"),
+        "side": np.where(buyEdge[ranked] >= sellEdge[ranked], "buy", "sell"),
+        "bidPrice": bid[ranked],
+        "midPrice": mid[ranked],
+        "askPrice": ask[ranked],
+        "markPrice": mark[ranked],
+        "bidVolatility": bidSigma[ranked],
+        "midVolatility": midSigma[ranked],
+        "askVolatility": askSigma[ranked],
+        "modelVolatility": modelSigma[ranked],
+        "modelPrice": modelPrice[ranked],
+        "edge": (modelPrice - mid)[ranked],
+        "netEdge": netEdge[ranked],
+        "flags": [describeFlags(f) for f in flags[ranked]]
+    })
+
+# === Watchlist Scanning ===
+# Results are shared across sessions for a few seconds so a room full of dashboards
+# refreshing the same watchlist triggers one fetch and one solve.
+scanCache = SharedCache(maxEntries=32, ttl=5.0)
+
+def scanWatchlist(tickers: list, topN: int = 25, maxExpirations: int | None = 4,
+                  provider: MarketDataProvider | None = None, maxWorkers: int = 8) -> pd.DataFrame:
+    provider = provider or getProvider()
+
+    def scan() -> pd.DataFrame:
+        expirations = fetchExpirations(tickers, maxWorkers, provider)
+        if maxExpirations is not None:
+            expirations = {t: sorted(dates)[:maxExpirations] for t, dates in expirations.items()}
+        chains = fetchOptionChains(tickers, expirations, maxWorkers, provider)
+        return scanChains(chains, spotPriceCache.getMany(tickers), topN)
+
+    key = ("scan", tuple(sorted(tickers)), (topN, maxExpirations), provider.asOf())
+    return scanCache.getOrCompute(key, scan)
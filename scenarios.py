@@ -0,0 +1,187 @@
+# === Import Libraries ===
+import argparse
+import sys
+import time
+from datetime import datetime
+from functools import partial
+from typing import NamedTuple
+import jax
+import jax.numpy as jnp
+import numpy as np
+import pandas as pd
+from pricing import blackScholesBatch, blackScholesChain, bucketLength, impliedVolatilityChain
+from cli import fileFormat
+from metrics import metrics
+
+# === Portfolio ===
+# Columnar positions across any number of underlyings; underlying indexes into
+# tickers and sharePrice.
+class Portfolio(NamedTuple):
+    tickers: tuple
+    sharePrice: np.ndarray
+    underlying: np.ndarray
+    strikePrice: np.ndarray
+    timeToMaturity: np.ndarray
+    isCall: np.ndarray
+    quantity: np.ndarray
+    sigma: np.ndarray
+    riskFreeRate: float = 0.05
+    multiplier: float = 100.0
+
+def portfolioFromFrame(frame: pd.DataFrame, asOf: datetime | None = None, riskFreeRate: float = 0.05,
+                       multiplier: float = 100.0) -> Portfolio:
+    # Rows: ticker, expiration, optionType, strike_price, quantity, sharePrice and either
+    # implied_volatility or mark_price (IV is then solved from the mark)
+    tickers, underlying = np.unique(frame["ticker"].astype(str).to_numpy(), return_inverse=True)
+    sharePrice = pd.to_numeric(frame["sharePrice"], errors="coerce").groupby(underlying).first().to_numpy(dtype=float)
+
+    today = pd.Timestamp(asOf or datetime.today()).normalize()
+    daysToExpiration = (pd.to_datetime(frame["expiration"]) - today).dt.days.to_numpy(dtype=float)
+    timeToMaturity = np.maximum(daysToExpiration / 365, 0.0)
+    strikePrice = pd.to_numeric(frame["strike_price"], errors="coerce").to_numpy(dtype=float)
+    isCall = (frame["optionType"] == "call").to_numpy()
+
+    sigma = np.full(len(frame), np.nan)
+    if "implied_volatility" in frame:
+        sigma[:] = pd.to_numeric(frame["implied_volatility"], errors="coerce").to_numpy(dtype=float)
+
+    # Any row without an IV is solved from its mark, when it has one
+    unsolved = np.flatnonzero(np.isnan(sigma))
+    if "mark_price" in frame and len(unsolved):
+        marketPrice = pd.to_numeric(frame["mark_price"], errors="coerce").to_numpy(dtype=float)
+        sigma[unsolved] = impliedVolatilityChain(marketPrice[unsolved], sharePrice[underlying[unsolved]], strikePrice[unsolved],
+                                                 timeToMaturity[unsolved], riskFreeRate, isCall[unsolved]).sigma
+
+    return Portfolio(tuple(tickers), sharePrice, underlying, strikePrice, timeToMaturity, isCall,
+                     pd.to_numeric(frame["quantity"], errors="coerce").to_numpy(dtype=float),
+                     sigma, riskFreeRate, multiplier)
+
+# === Scenario Engine ===
+class ScenarioResult(NamedTuple):
+    spotShocks: np.ndarray
+    volShocks: np.ndarray
+    timeSteps: np.ndarray
+    tickers: tuple
+    pnl: np.ndarray
+    pnlByUnderlying: np.ndarray
+    baseValue: float
+    excludedPositions: int
+
+@partial(jax.jit, static_argnames=("underlyings",))
+def scenarioChunk(sharePrice, underlying, K, T, riskFreeRate, sigma, isCall, weight, baseValue,
+                  spotShock, volShock, timeStep, underlyings: int):
+    # (scenarios x positions) values for one chunk, reduced straight to P&L per underlying
+    S = sharePrice[underlying][jnp.newaxis, :] * (1 + spotShock[:, jnp.newaxis])
+    shockedSigma = jnp.maximum(sigma[jnp.newaxis, :] + volShock[:, jnp.newaxis], 1e-4)
+    shockedT = jnp.maximum(T[jnp.newaxis, :] - timeStep[:, jnp.newaxis], 0.0)
+    pnl = (blackScholesBatch(S, K, shockedT, riskFreeRate, shockedSigma, isCall) - baseValue) * weight
+    return pnl @ jax.nn.one_hot(underlying, underlyings, dtype=pnl.dtype)
+
+def runScenarios(portfolio: Portfolio, spotShocks, volShocks, timeSteps, maxElements: int = 4_000_000) -> ScenarioResult:
+    # Spot shocks are relative and applied to every underlying at once, vol shocks are
+    # absolute, time steps are in days. Scenarios are evaluated in chunks sized so that
+    # no chunk holds more than maxElements (scenario, position) values at a time.
+    spotShocks, volShocks, timeSteps = (np.atleast_1d(np.asarray(x, dtype=float)) for x in (spotShocks, volShocks, timeSteps))
+    cube = [axis.ravel() for axis in np.meshgrid(spotShocks, volShocks, timeSteps / 365, indexing="ij")]
+    scenarios = cube[0].size
+    underlyings = len(portfolio.tickers)
+
+    # Positions that cannot be priced (no IV, no spot) are left out rather than poisoning the sums
+    S = portfolio.sharePrice[portfolio.underlying]
+    priced = (np.isfinite(portfolio.sigma) & np.isfinite(S) & np.isfinite(portfolio.strikePrice)
+              & np.isfinite(portfolio.quantity))
+    weight = np.where(priced, portfolio.quantity * portfolio.multiplier, 0.0)
+    sigma = np.where(priced, portfolio.sigma, 0.2)
+    K = np.where(priced, portfolio.strikePrice, 1.0)
+    sharePrice = np.where(np.isfinite(portfolio.sharePrice), portfolio.sharePrice, 1.0)
+    baseValue = np.asarray(blackScholesChain(sharePrice[portfolio.underlying], K, portfolio.timeToMaturity,
+                                             portfolio.riskFreeRate, sigma, portfolio.isCall))
+
+    # Positions pad up to a bucket and scenarios to a whole number of chunks, so every
+    # chunk of every run with a similar book reuses one compiled kernel
+    n = len(weight)
+    length = bucketLength(n)
+    chunk = max(1, min(scenarios, maxElements // length))
+    padPositions = lambda a, fill: np.concatenate([a, np.full(length - n, fill, dtype=a.dtype)])
+    positions = (
+        jnp.asarray(sharePrice),
+        jnp.asarray(padPositions(portfolio.underlying.astype(np.int32), 0)),
+        jnp.asarray(padPositions(K, 1.0)),
+        jnp.asarray(padPositions(np.asarray(portfolio.timeToMaturity, dtype=float), 0.0)),
+        portfolio.riskFreeRate,
+        jnp.asarray(padPositions(sigma, 0.2)),
+        jnp.asarray(padPositions(np.asarray(portfolio.isCall, dtype=bool), True)),
+        jnp.asarray(padPositions(weight, 0.0)),
+        jnp.asarray(padPositions(baseValue, 0.0))
+    )
+    padded = -(-scenarios // chunk) * chunk
+    cube = [np.concatenate([axis, np.zeros(padded - scenarios)]) for axis in cube]
+
+    pnlByUnderlying = np.empty((padded, underlyings))
+    with metrics.timer("scenarios"):
+        for start in range(0, padded, chunk):
+            shocks = (jnp.asarray(axis[start:start + chunk]) for axis in cube)
+            pnlByUnderlying[start:start + chunk] = np.asarray(scenarioChunk(*positions, *shocks, underlyings=underlyings))
+    metrics.increment("scenarios.evaluated", scenarios * n)
+
+    shape = (len(spotShocks), len(volShocks), len(timeSteps))
+    pnlByUnderlying = pnlByUnderlying[:scenarios].T.reshape((underlyings,) + shape)
+    return ScenarioResult(spotShocks, volShocks, timeSteps, portfolio.tickers, pnlByUnderlying.sum(axis=0),
+                          pnlByUnderlying, float((baseValue * weight).sum()), int((~priced).sum()))
+
+# === Aggregates ===
+def worstScenario(result: ScenarioResult) -> dict:
+    i, j, k = np.unravel_index(np.argmin(result.pnl), result.pnl.shape)
+    return {"spotShock": float(result.spotShocks[i]), "volShock": float(result.volShocks[j]),
+            "timeStep": float(result.timeSteps[k]), "pnl": float(result.pnl[i, j, k])}
+
+def scenarioFrame(result: ScenarioResult) -> pd.DataFrame:
+    # One row per scenario: the shocks, total P&L and P&L per underlying
+    spot, vol, days = (axis.ravel() for axis in np.meshgrid(result.spotShocks, result.volShocks, result.timeSteps, indexing="ij"))
+    frame = pd.DataFrame({"spotShock": spot, "volShock": vol, "timeStep": days, "pnl": result.pnl.ravel()})
+    for ticker, pnl in zip(result.tickers, result.pnlByUnderlying):
+        frame[f"pnl.{ticker}"] = pnl.ravel()
+    return frame
+
+# === Command Line Entry Point ===
+def readFrame(path: str) -> pd.DataFrame:
+    fileType = fileFormat(path)
+    if fileType == "parquet":
+        return pd.read_parquet(path)
+    if fileType == "csv":
+        return pd.read_csv(path)
+    return pd.read_json(path, lines=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Revalue a portfolio of option positions across spot, vol and time shocks.")
+    parser.add_argument("positions", help="Positions file (CSV, Parquet or JSONL)")
+    parser.add_argument("output", help="Scenario P&L file; the extension picks the format")
+    parser.add_argument("--spot-shocks", type=float, nargs="+", default=list(np.round(np.linspace(-0.2, 0.2, 9), 4)))
+    parser.add_argument("--vol-shocks", type=float, nargs="+", default=[-0.1, -0.05, 0.0, 0.05, 0.1])
+    parser.add_argument("--days", type=float, nargs="+", default=[0.0, 1.0, 7.0])
+    parser.add_argument("--as-of", type=datetime.fromisoformat, help="Valuation date (defaults to today)")
+    parser.add_argument("--risk-free-rate", type=float, default=0.05)
+    parser.add_argument("--max-elements", type=int, default=4_000_000, help="Largest (scenario, position) block held at once")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    portfolio = portfolioFromFrame(readFrame(args.positions), args.as_of, args.risk_free_rate)
+    result = runScenarios(portfolio, args.spot_shocks, args.vol_shocks, args.days, args.max_elements)
+    frame = scenarioFrame(result)
+
+    fileType = fileFormat(args.output)
+    if fileType == "parquet":
+        frame.to_parquet(args.output, index=False)
+    elif fileType == "csv":
+        frame.to_csv(args.output, index=False)
+    else:
+        frame.to_json(args.output, orient="records", lines=True)
+
+    worst = worstScenario(result)
+    print(f"Revalued {len(portfolio.quantity)} positions across {len(frame)} scenarios in {time.perf_counter() - start:.2f}s; "
+          f"worst P&L {worst['pnl']:.2f} at spot {worst['spotShock']:+.2%}, vol {worst['volShock']:+.2f}, "
+          f"{worst['timeStep']:g} days ({result.excludedPositions} positions could not be priced)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+# === Import Libraries ===
+from typing import NamedTuple
+import numpy as np
+
+# === Screening Flags ===
+# Bit flags per contract side; a contract can fail several checks at once.
+FLAG_PARITY = 1
+FLAG_VERTICAL = 2
+FLAG_BUTTERFLY = 4
+FLAG_CALENDAR = 8
+FLAG_OUTSIDE_QUOTE = 16
+FLAG_STALE = 32
+FLAG_ALL = FLAG_PARITY | FLAG_VERTICAL | FLAG_BUTTERFLY | FLAG_CALENDAR | FLAG_OUTSIDE_QUOTE | FLAG_STALE
+
+flagNames = {
+    FLAG_PARITY: "Parity",
+    FLAG_VERTICAL: "Vertical",
+    FLAG_BUTTERFLY: "Butterfly",
+    FLAG_CALENDAR: "Calendar",
+    FLAG_OUTSIDE_QUOTE: "Outside Bid/Ask",
+    FLAG_STALE: "Stale"
+}
+
+class ParityFit(NamedTuple):
+    forward: float
+    discountFactor: float
+    impliedRate: float
+    pairs: int
+
+def describeFlags(flags: int) -> str:
+    return ", ".join(name for flag, name in flagNames.items() if flags & flag)
+
+# === Vectorized Checks ===
+# Every check works on whole strike-sorted columns; NaN prices are skipped, not flagged.
+def fitParity(strikePrice: np.ndarray, callPrice: np.ndarray, putPrice: np.ndarray, timeToMaturity: float,
+              tolerance: np.ndarray) -> tuple:
+    # C - P = D * F - D * K, so a line through the call-put pairs gives D and F. A median
+    # line is fitted first so one bad quote cannot drag it, then refined on the pairs near it.
+    paired = np.isfinite(callPrice) & np.isfinite(putPrice)
+    residual = np.full(len(strikePrice), np.nan)
+    if paired.sum() < 2:
+        return ParityFit(np.nan, np.nan, np.nan, int(paired.sum())), residual
+
+    K, difference = strikePrice[paired], (callPrice - putPrice)[paired]
+    slope = np.median(np.diff(difference) / np.diff(K))
+    intercept = np.median(difference - slope * K)
+    inliers = np.abs(difference - (intercept + slope * K)) <= np.broadcast_to(tolerance, paired.shape)[paired]
+    if inliers.sum() >= 2:
+        slope, intercept = np.polyfit(K[inliers], difference[inliers], 1)
+    residual[paired] = difference - (intercept + slope * K)
+    used = paired.copy()
+    used[paired] = inliers
+
+    discountFactor = -slope
+    if discountFactor <= 0:
+        return ParityFit(np.nan, np.nan, np.nan, int(used.sum())), np.full(len(strikePrice), np.nan)
+    impliedRate = -np.log(discountFactor) / timeToMaturity if timeToMaturity > 0 else np.nan
+    return ParityFit(intercept / discountFactor, discountFactor, impliedRate, int(used.sum())), residual
+
+def parityBand(strikePrice: np.ndarray, callPrice: np.ndarray, putPrice: np.ndarray, discountFactor: float,
+               dividendDiscount: float, tolerance: np.ndarray) -> tuple:
+    # Listed equity options are American, so parity only bounds the pair:
+    # S * Dq - K <= C - P <= S - D * K, with the European line S * Dq - D * K inside it.
+    # Each pair bounds the spot from both sides; the spot inside the most of those
+    # intervals is taken as the chain's, and pairs whose interval misses it are off.
+    paired = np.isfinite(callPrice) & np.isfinite(putPrice)
+    residual = np.full(len(strikePrice), np.nan)
+    if not paired.any():
+        return np.nan, residual
+
+    K, difference = strikePrice[paired], (callPrice - putPrice)[paired]
+    width = np.broadcast_to(tolerance, paired.shape)[paired]
+    low = difference + discountFactor * K - width
+    high = (difference + K + width) / dividendDiscount
+    covered = np.searchsorted(np.sort(low), low, side="right") - np.searchsorted(np.sort(high), low, side="left")
+    best = low[np.argmax(covered)]
+    spot = (best + high[(low <= best) & (high >= best)].min()) / 2
+
+    upper = spot - discountFactor * K
+    lower = spot * dividendDiscount - K
+    residual[paired] = np.where(difference > upper, difference - upper, np.minimum(difference - lower, 0.0))
+    return spot, residual
+
+def verticalViolations(strikePrice: np.ndarray, price: np.ndarray, discountFactor: float, isCall: bool,
+                       tolerance: float) -> np.ndarray:
+    # Calls fall and puts rise with strike, by no more than the discounted strike gap
+    flags = np.zeros(len(price), dtype=bool)
+    rows = np.flatnonzero(np.isfinite(price))
+    if len(rows) < 2:
+        return flags
+    strikeGap = np.diff(strikePrice[rows])
+    priceGap = -np.diff(price[rows]) if isCall else np.diff(price[rows])
+    violated = (priceGap < -tolerance) | (priceGap > discountFactor * strikeGap + tolerance)
+    flags[rows[:-1][violated]] = True
+    flags[rows[1:][violated]] = True
+    return flags
+
+def butterflyViolations(strikePrice: np.ndarray, price: np.ndarray, tolerance: float) -> np.ndarray:
+    # Prices are convex in strike: the middle of every neighbouring triple sits on or below the chord
+    flags = np.zeros(len(price), dtype=bool)
+    rows = np.flatnonzero(np.isfinite(price))
+    if len(rows) < 3:
+        return flags
+    k, p = strikePrice[rows], price[rows]
+    weight = (k[2:] - k[1:-1]) / (k[2:] - k[:-2])
+    violated = weight * p[:-2] + (1 - weight) * p[2:] - p[1:-1] < -tolerance
+    flags[rows[1:-1][violated]] = True
+    return flags
+
+def quoteViolations(price: np.ndarray, bidPrice: np.ndarray, askPrice: np.ndarray, tolerance: float) -> tuple:
+    # Stale: a mark without a live two-sided market behind it
+    quoted = np.isfinite(price)
+    twoSided = (bidPrice > 0) & (askPrice > 0)
+    outside = quoted & twoSided & ((price < bidPrice - tolerance) | (price > askPrice + tolerance) | (bidPrice > askPrice))
+    stale = quoted & ~twoSided
+    return outside, stale
+
+# === Chain Screening ===
+def screenChain(chain, tolerance: float = 0.05) -> tuple:
+    # Returns (callFlags, putFlags, ParityFit) for one expiration
+    K, C, P = chain.strikePrice, chain.callPrice, chain.putPrice
+    T = float(chain.timeToMaturity[0]) if len(chain) else 0.0
+    callFlags = np.zeros(len(chain), dtype=np.int32)
+    putFlags = np.zeros(len(chain), dtype=np.int32)
+    if not len(chain):
+        return callFlags, putFlags, ParityFit(np.nan, np.nan, np.nan, 0)
+
+    # Parity is allowed half of both spreads on top of the tolerance, since marks are mids.
+    # Flags come from the American bounds, which European prices satisfy as well.
+    halfSpread = np.nan_to_num((chain.askPrice - chain.bidPrice) / 2) + np.nan_to_num((chain.putAskPrice - chain.putBidPrice) / 2)
+    parityTolerance = tolerance + np.maximum(halfSpread, 0.0)
+    riskFreeDiscount, dividendDiscount = np.exp(-chain.riskFreeRate * T), np.exp(-chain.dividendYield * T)
+    spot, residual = parityBand(K, C, P, riskFreeDiscount, dividendDiscount, parityTolerance)
+    parityViolated = np.abs(residual) > parityTolerance
+    callFlags[parityViolated] |= FLAG_PARITY
+    putFlags[parityViolated] |= FLAG_PARITY
+
+    if chain.exerciseStyle == "american":
+        # No parity line to fit: the forward comes from the bounds' spot and the model rate,
+        # and a vertical can be exercised today, so its bound is the undiscounted strike gap
+        parity = ParityFit(spot * dividendDiscount / riskFreeDiscount, riskFreeDiscount, np.nan,
+                           int(np.sum(np.abs(residual) <= parityTolerance)))
+        discountFactor = 1.0
+    else:
+        # The fitted line gives the forward and discount factor the other checks use
+        parity, _ = fitParity(K, C, P, T, parityTolerance)
+        discountFactor = parity.discountFactor if np.isfinite(parity.discountFactor) else riskFreeDiscount
+    for flags, price, isCall in ((callFlags, C, True), (putFlags, P, False)):
+        flags[verticalViolations(K, price, discountFactor, isCall, tolerance)] |= FLAG_VERTICAL
+        flags[butterflyViolations(K, price, tolerance)] |= FLAG_BUTTERFLY
+
+    for flags, price, bidPrice, askPrice in ((callFlags, C, chain.bidPrice, chain.askPrice),
+                                             (putFlags, P, chain.putBidPrice, chain.putAskPrice)):
+        outside, stale = quoteViolations(price, bidPrice, askPrice, tolerance)
+        flags[outside] |= FLAG_OUTSIDE_QUOTE
+        flags[stale] |= FLAG_STALE
+    return callFlags, putFlags, parity
+
+def callEquivalents(chain) -> tuple:
+    # Puts are compared through parity (P + D * (F - K)), since a deep in-the-money
+    # European put can legitimately be worth less at a later expiration. An American
+    # put never is, so American puts are compared as they are.
+    if chain.exerciseStyle == "american":
+        return chain.callPrice, chain.putPrice
+    parity = chain.parity
+    if parity is None or not np.isfinite(parity.discountFactor):
+        return chain.callPrice, np.full(len(chain), np.nan)
+    return chain.callPrice, chain.putPrice + parity.discountFactor * (parity.forward - chain.strikePrice)
+
+def screenCalendar(chains: list, tolerance: float = 0.05):
+    # Same strike: a later expiration is never cheaper than an earlier one.
+    # Sets FLAG_CALENDAR in place on every chain of each ticker.
+    byTicker = {}
+    for chain in chains:
+        chain.callFlags &= ~FLAG_CALENDAR
+        chain.putFlags &= ~FLAG_CALENDAR
+        if len(chain):
+            byTicker.setdefault(chain.ticker, []).append(chain)
+
+    for tickerChains in byTicker.values():
+        tickerChains.sort(key=lambda c: float(c.timeToMaturity[0]))
+        for near, far in zip(tickerChains, tickerChains[1:]):
+            _, nearRows, farRows = np.intersect1d(near.strikePrice, far.strikePrice, assume_unique=True, return_indices=True)
+            for nearPrice, farPrice, flagColumn in zip(callEquivalents(near), callEquivalents(far), ("callFlags", "putFlags")):
+                violated = farPrice[farRows] < nearPrice[nearRows] - tolerance
+                getattr(near, flagColumn)[nearRows[violated]] |= FLAG_CALENDAR
+                getattr(far, flagColumn)[farRows[violated]] |= FLAG_CALENDAR
+
+def screenChains(chains, tolerance: float = 0.05) -> list:
+    # One pass over every chain (any tickers and expirations), then the cross-expiration check
+    chains = list(chains.values()) if isinstance(chains, dict) else list(chains)
+    for chain in chains:
+        chain.screen(tolerance)
+    screenCalendar(chains, tolerance)
+    return chains
@@ -0,0 +1,331 @@
+# === Import Libraries ===
+import os
+import shutil
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+import numpy as np
+from chain import OptionChain
+from surface import VolatilitySurface
+from metrics import metrics
+
+# === Snapshot Store ===
+# Append-only history of fetched chains with their solved IVs and Greeks, laid out as
+# root/<ticker>/<YYYY-MM-DD>/<segment>.npy. Each append writes one segment: a record
+# array with one row per strike of every chain appended, so reads memory-map the
+# segments instead of parsing them. Partitions before today are compacted into a
+# single sorted, de-duplicated segment, and partitions older than the retention
+# window are dropped.
+class SnapshotStore:
+    greekNames = ("delta", "gamma", "vega", "theta", "rho")
+    recordType = np.dtype(
+        [("snapshotTime", "M8[us]"), ("expiration", "M8[D]"), ("sharePrice", "f8"), ("riskFreeRate", "f8"), ("american", "?")]
+        + [(name, "f8") for name in OptionChain.priceColumns + OptionChain.resultColumns]
+        + [(name, "i1") for name in OptionChain.statusColumns]
+        + [(name, "u1") for name in OptionChain.flagColumns]
+        + [(f"{side}{greek.capitalize()}", "f4") for greek in greekNames for side in ("call", "put")]
+    )
+
+    def __init__(self, root: str, retentionDays: int | None = 90):
+        self.root = os.path.expanduser(str(root))
+        self.retentionDays = retentionDays
+        self.lock = threading.Lock()
+        self.maintainedOn = None
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def snapshotInstant(snapshotTime: datetime | None) -> datetime:
+        # Stored as naive local time, the same clock timeToMaturityCalc and datetime.now() use
+        snapshotTime = snapshotTime or datetime.now()
+        if snapshotTime.tzinfo is not None:
+            snapshotTime = snapshotTime.astimezone().replace(tzinfo=None)
+        return snapshotTime
+
+    @staticmethod
+    def toDate(value) -> date | None:
+        if value is None or isinstance(value, date) and not isinstance(value, datetime):
+            return value
+        if isinstance(value, datetime):
+            return value.date()
+        return date.fromisoformat(str(value)[:10])
+
+    def partitionPath(self, ticker: str, day: date) -> str:
+        return os.path.join(self.root, ticker, day.isoformat())
+
+    def partitions(self, ticker: str, start=None, end=None) -> list:
+        # (date, path) for every partition of ticker within [start, end], oldest first
+        tickerPath = os.path.join(self.root, ticker)
+        if not os.path.isdir(tickerPath):
+            return []
+        start, end = self.toDate(start), self.toDate(end)
+        found = []
+        for name in sorted(os.listdir(tickerPath)):
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if (start is None or day >= start) and (end is None or day <= end):
+                found.append((day, os.path.join(tickerPath, name)))
+        return found
+
+    def tickers(self) -> list:
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    @staticmethod
+    def segmentPaths(partition: str) -> list:
+        return sorted(os.path.join(partition, name) for name in os.listdir(partition) if name.endswith(".npy"))
+
+    def writeSegment(self, partition: str, records: np.ndarray, label: str) -> str:
+        # Written under a temporary name and renamed into place, so readers never see half a segment
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"{label}-{uuid.uuid4().hex[:12]}.npy")
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, records)
+        os.replace(temporary, path)
+        return path
+
+    # === Writing ===
+    def records(self, chain: OptionChain, snapshotTime: datetime, greeks: bool = True) -> np.ndarray:
+        records = np.zeros(len(chain), dtype=self.recordType)
+        records["snapshotTime"] = np.datetime64(snapshotTime, "us")
+        records["expiration"] = np.datetime64(chain.expiration, "D")
+        records["sharePrice"] = np.nan if chain.sharePrice is None else chain.sharePrice
+        records["riskFreeRate"] = chain.riskFreeRate
+        records["american"] = chain.exerciseStyle == "american"
+        for name in OptionChain.priceColumns + OptionChain.resultColumns + OptionChain.statusColumns + OptionChain.flagColumns:
+            records[name] = getattr(chain, name)
+
+        solved = chain.sharePrice is not None and np.any(chain.volatilityCallStatus >= 0)
+        for side, sideGreeks in zip(("call", "put"), chain.computeGreeks(chain.sharePrice) if greeks and solved else (None, None)):
+            for greek in self.greekNames:
+                records[f"{side}{greek.capitalize()}"] = np.nan if sideGreeks is None else getattr(sideGreeks, greek)
+        return records
+
+    def append(self, chains, snapshotTime: datetime | None = None, greeks: bool = True) -> list:
+        # One segment per ticker for everything appended together; returns the segment paths
+        chains = [chains] if isinstance(chains, OptionChain) else [c for c in chains if len(c)]
+        snapshotTime = self.snapshotInstant(snapshotTime)
+        byTicker = {}
+        for chain in chains:
+            byTicker.setdefault(chain.ticker, []).append(chain)
+
+        paths = []
+        with metrics.timer("snapshotWrite"):
+            for ticker, tickerChains in byTicker.items():
+                records = np.concatenate([self.records(c, snapshotTime, greeks) for c in tickerChains])
+                paths.append(self.writeSegment(self.partitionPath(ticker, snapshotTime.date()), records,
+                                               f"{snapshotTime:%H%M%S%f}"))
+                metrics.increment("snapshot.rowsWritten", len(records))
+
+        # Retention and compaction run once a day, off the caller's thread
+        today = date.today()
+        if self.maintainedOn != today:
+            self.maintainedOn = today
+            threading.Thread(target=self.maintain, daemon=True).start()
+        return paths
+
+    # === Reading ===
+    def segments(self, ticker: str, start=None, end=None) -> list:
+        # Memory-mapped, read-only record arrays; nothing is read until a column is touched
+        with metrics.timer("snapshotRead"):
+            return [np.load(path, mmap_mode="r") for _, partition in self.partitions(ticker, start, end)
+                    for path in self.segmentPaths(partition)]
+
+    def gather(self, segments: list, select=None) -> np.ndarray:
+        # select(segment) picks rows out of each memory-mapped segment before anything is
+        # concatenated, so only the matching rows are ever copied out of the files
+        if select is not None:
+            segments = [segment[select(segment)] for segment in segments]
+        segments = [segment for segment in segments if len(segment)]
+        if not segments:
+            return np.empty(0, dtype=self.recordType)
+        return segments[0] if len(segments) == 1 else np.concatenate(segments)
+
+    def read(self, ticker: str, start=None, end=None, select=None) -> np.ndarray:
+        return self.gather(self.segments(ticker, start, end), select)
+
+    def toDataFrame(self, ticker: str, start=None, end=None) -> "pd.DataFrame":
+        import pandas as pd
+        records = self.read(ticker, start, end)
+        frame = pd.DataFrame({name: records[name] for name in self.recordType.names})
+        frame.insert(0, "ticker", ticker)
+        return frame
+
+    def chainFromRecords(self, ticker: str, records: np.ndarray) -> OptionChain:
+        chain = OptionChain(ticker, str(records["expiration"][0]),
+                            riskFreeRate=float(records["riskFreeRate"][0]),
+                            **{name: records[name] for name in OptionChain.priceColumns})
+        order = np.argsort(records["strikePrice"], kind="stable")
+        for name in OptionChain.resultColumns + OptionChain.statusColumns + OptionChain.flagColumns:
+            getattr(chain, name)[:] = records[name][order]
+        sharePrice = float(records["sharePrice"][0])
+        chain.sharePrice = sharePrice if np.isfinite(sharePrice) else None
+        if records["american"][0]:
+            chain.exerciseStyle = "american"
+        return chain
+
+    def loadChains(self, ticker: str, asOf: datetime | None = None, maxAge: float | None = None,
+                   expirations: list | None = None) -> dict:
+        # The chains of the snapshot taken at asOf, or else the latest stored snapshot of each
+        # expiration (ignoring any older than maxAge seconds). Keyed like fetchOptionChains.
+        if asOf is not None:
+            asOf = self.snapshotInstant(asOf)
+            day = asOf.date()
+        else:
+            latest = self.partitions(ticker)
+            if not latest:
+                return {}
+            day = latest[-1][0]
+            if maxAge is not None and day < (datetime.now() - timedelta(seconds=maxAge)).date():
+                return {}
+
+        earliest = None if maxAge is None else np.datetime64(datetime.now() - timedelta(seconds=maxAge), "us")
+
+        def matching(segment) -> np.ndarray:
+            # Segments are in snapshot-time order, so one outside the window is skipped unread
+            first, last = segment["snapshotTime"][0], segment["snapshotTime"][-1]
+            if asOf is not None and not first <= np.datetime64(asOf, "us") <= last or earliest is not None and last < earliest:
+                return np.zeros(len(segment), dtype=bool)
+            keep = np.ones(len(segment), dtype=bool)
+            if expirations is not None:
+                keep &= np.isin(segment["expiration"], np.array(expirations, dtype="M8[D]"))
+            if asOf is not None:
+                keep &= segment["snapshotTime"] == np.datetime64(asOf, "us")
+            elif earliest is not None:
+                keep &= segment["snapshotTime"] >= earliest
+            return keep
+
+        # The latest snapshot of each expiration is found from the columns alone, then only
+        # its rows are copied out of the segments
+        segments = self.segments(ticker, day, day)
+        latest = {}
+        for segment in segments:
+            keep = matching(segment)
+            expiration, snapshotTime = segment["expiration"][keep], segment["snapshotTime"][keep]
+            for value in np.unique(expiration):
+                newest = snapshotTime[expiration == value].max()
+                latest[value] = max(latest.get(value, newest), newest)
+        if not latest:
+            return {}
+        listed = np.array(sorted(latest), dtype="M8[D]")
+        newestTimes = np.array([latest[value] for value in listed], dtype="M8[us]")
+
+        def newestRows(segment) -> np.ndarray:
+            position = np.minimum(np.searchsorted(listed, segment["expiration"]), len(listed) - 1)
+            return ((listed[position] == segment["expiration"]) & (newestTimes[position] == segment["snapshotTime"])
+                    & matching(segment))
+
+        records = self.gather(segments, newestRows)
+        chains = {}
+        for expiration in np.unique(records["expiration"]):
+            rows = self.uniqueRows(records[records["expiration"] == expiration])
+            chain = self.chainFromRecords(ticker, rows)
+            chains[(ticker, chain.expiration)] = chain
+        metrics.increment("snapshot.chainsLoaded", len(chains))
+        return chains
+
+    def loadSurface(self, ticker: str, asOf: datetime | None = None, maxAge: float | None = None,
+                    expirations: list | None = None, riskFreeRate: float = 0.05) -> VolatilitySurface | None:
+        # Rebuilt from the stored IVs, without solving, and only when every expiration listed
+        # is stored. American chains' IVs are not Black-Scholes volatilities, so those
+        # expirations are re-solved by the surface.
+        chains = list(self.loadChains(ticker, asOf, maxAge, expirations).values())
+        if expirations is not None and len(chains) < len(set(expirations)):
+            return None
+        S = next((c.sharePrice for c in chains if c.sharePrice is not None), None)
+        if S is None:
+            return None
+        surface = VolatilitySurface(ticker, riskFreeRate)
+        surface.loadSolved([c for c in chains if c.exerciseStyle != "american"], S)
+        american = [c for c in chains if c.exerciseStyle == "american"]
+        if american:
+            surface.build(american, S, complete=False)
+        return surface if surface.slices else None
+
+    # === Retention & Compaction ===
+    def prune(self, retentionDays: int | None = None, today: date | None = None) -> int:
+        # Drops whole partitions older than the retention window; returns how many were dropped
+        retentionDays = self.retentionDays if retentionDays is None else retentionDays
+        if retentionDays is None:
+            return 0
+        cutoff = (today or date.today()) - timedelta(days=retentionDays)
+        dropped = 0
+        for ticker in self.tickers():
+            for day, partition in self.partitions(ticker, end=cutoff - timedelta(days=1)):
+                shutil.rmtree(partition, ignore_errors=True)
+                dropped += 1
+            tickerPath = os.path.join(self.root, ticker)
+            if not os.listdir(tickerPath):
+                os.rmdir(tickerPath)
+        metrics.increment("snapshot.partitionsPruned", dropped)
+        return dropped
+
+    @staticmethod
+    def uniqueRows(records: np.ndarray) -> np.ndarray:
+        # Sorted by (snapshotTime, expiration, strike), keeping the last copy of any row stored
+        # twice (the same snapshot appended again, or by two processes)
+        order = np.lexsort((records["strikePrice"], records["expiration"], records["snapshotTime"]))[::-1]
+        key = np.stack([records["snapshotTime"].astype(np.int64), records["expiration"].astype(np.int64),
+                        np.ascontiguousarray(records["strikePrice"]).view(np.int64)], axis=1)[order]
+        _, last = np.unique(key, axis=0, return_index=True)
+        return records[order[last]]
+
+    def compactPartition(self, partition: str) -> int:
+        # Merges every segment into one sorted by (snapshotTime, expiration, strike), keeping
+        # the last copy of any duplicated row. Segments appended meanwhile are left alone.
+        paths = self.segmentPaths(partition)
+        if len(paths) < 2:
+            return 0
+        records = self.uniqueRows(np.concatenate([np.load(path) for path in paths]))
+
+        first = records["snapshotTime"][0].astype(datetime)
+        self.writeSegment(partition, records, f"{first:%H%M%S%f}-compacted")
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(paths)
+
+    def compact(self, ticker: str | None = None, before: date | None = None) -> int:
+        # Partitions before today by default, so the one taking live appends is not rewritten
+        before = before or date.today()
+        compacted = 0
+        with self.lock, metrics.timer("snapshotCompact"):
+            for name in [ticker] if ticker else self.tickers():
+                for _, partition in self.partitions(name, end=before - timedelta(days=1)):
+                    compacted += self.compactPartition(partition)
+        metrics.increment("snapshot.segmentsCompacted", compacted)
+        return compacted
+
+    def maintain(self):
+        try:
+            self.prune()
+            self.compact()
+        except Exception as e:
+            metrics.increment("snapshot.errors")
+            print(f"Snapshot maintenance failed: {e}")
+
+# === Active Store ===
+# On by default under ~/.cache like the JAX compilation cache; OPTIONS_SNAPSHOT_DIR moves
+# it and setSnapshotStore(None) turns persistence off.
+activeStore = None
+storeConfigured = False
+
+def getSnapshotStore() -> SnapshotStore | None:
+    global activeStore, storeConfigured
+    if not storeConfigured:
+        root = os.getenv("OPTIONS_SNAPSHOT_DIR") or os.path.expanduser("~/.cache/options-pricing/snapshots")
+        retentionDays = os.getenv("OPTIONS_SNAPSHOT_RETENTION_DAYS")
+        try:
+            activeStore = SnapshotStore(root, int(retentionDays) if retentionDays else 90)
+        except OSError as e:
+            print(f"Snapshot store unavailable at {root}: {e}")
+            activeStore = None
+        storeConfigured = True
+    return activeStore
+
+def setSnapshotStore(store: SnapshotStore | None):
+    global activeStore, storeConfigured
+    activeStore, storeConfigured = store, True
@@ -0,0 +1,64 @@
+# === Import Libraries ===
+import threading
+import time
+from chain import OptionChain
+from fetch import buildOptionChain, withRetries
+from providers import MarketDataProvider, getProvider
+from cache import spotPriceCache
+
+# === Live Chain Streaming ===
+# Keeps one chain current: each poll (or pushed batch of quotes) is diffed against
+# the chain in memory and only contracts whose mark or spot moved are re-solved,
+# warm-started from their previous IV.
+class ChainStreamer:
+    def __init__(self, ticker: str, expirationDate: str, provider: MarketDataProvider | None = None,
+                 chain: OptionChain | None = None):
+        self.ticker = ticker
+        self.expirationDate = expirationDate
+        self.provider = provider
+        self.chain = chain
+        self.lock = threading.Lock()
+        self.lastUpdate = None
+        self.lastResolved = 0
+
+    def currentSharePrice(self) -> float | None:
+        # A poll always wants a fresh spot, not one still inside the cache TTL, and from the
+        # streamer's own provider: replayed quotes are priced against the replayed spot
+        if self.provider is None:
+            return spotPriceCache.refresh([self.ticker]).get(self.ticker)
+        return self.provider.getSharePrice(self.ticker)
+
+    def poll(self) -> int:
+        provider = self.provider or getProvider()
+        calls = withRetries(lambda: provider.getOptionQuotes(self.ticker, self.expirationDate, 'call'))
+        puts = withRetries(lambda: provider.getOptionQuotes(self.ticker, self.expirationDate, 'put'))
+        latest = buildOptionChain(self.ticker, self.expirationDate, calls, puts, provider.asOf())
+        S = self.currentSharePrice()
+
+        with self.lock:
+            if self.chain is None:
+                self.chain = latest
+                self.chain.solveImpliedVolatility(S)
+                resolved = 2 * len(latest)
+            else:
+                resolved = self.chain.update(latest, S)
+            self.lastUpdate, self.lastResolved = time.time(), resolved
+        return resolved
+
+    def push(self, quotes: list, S: float | None = None) -> int:
+        with self.lock:
+            if self.chain is None:
+                return 0
+            resolved = self.chain.applyQuotes(quotes, S if S is not None else self.chain.sharePrice)
+            self.lastUpdate, self.lastResolved = time.time(), resolved
+        return resolved
+
+    def run(self, interval: float = 1.0, stopEvent: threading.Event | None = None):
+        stopEvent = stopEvent or threading.Event()
+        while not stopEvent.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error polling {self.ticker} {self.expirationDate}: {e}")
+            stopEvent.wait(max(0.0, interval - (time.monotonic() - started)))
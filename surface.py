@@ -0,0 +1,191 @@
+# === Import Libraries ===
+import hashlib
+import numpy as np
+from pricing import IV_CONVERGED, impliedVolatilityChain
+from screener import screenChains
+
+# === Volatility Slice ===
+# One expiration of the surface: a natural cubic spline of total variance
+# (sigma^2 * T) over log-moneyness log(K / F).
+class VolatilitySlice:
+    def __init__(self, expiration: str, timeToMaturity: float, logMoneyness: np.ndarray,
+                 totalVariance: np.ndarray, fingerprint: str):
+        order = np.argsort(logMoneyness)
+        self.expiration = expiration
+        self.timeToMaturity = timeToMaturity
+        self.logMoneyness = np.asarray(logMoneyness, dtype=float)[order]
+        self.totalVariance = np.asarray(totalVariance, dtype=float)[order]
+        self.fingerprint = fingerprint
+        self.secondDerivatives = self.fitSpline(self.logMoneyness, self.totalVariance)
+
+    @staticmethod
+    def fitSpline(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        n = len(x)
+        M = np.zeros(n)
+        if n < 3:
+            return M
+        h = np.diff(x)
+        A = np.zeros((n - 2, n - 2))
+        i = np.arange(n - 2)
+        A[i, i] = 2 * (h[:-1] + h[1:])
+        A[i[1:], i[:-1]] = h[1:-1]
+        A[i[:-1], i[1:]] = h[1:-1]
+        slopes = np.diff(y) / h
+        M[1:-1] = np.linalg.solve(A, 6 * np.diff(slopes))
+        return M
+
+    def totalVarianceAt(self, logMoneyness) -> np.ndarray:
+        x, y, M = self.logMoneyness, self.totalVariance, self.secondDerivatives
+        if len(x) == 1:
+            return np.full(np.shape(logMoneyness), y[0])
+
+        # Flat extrapolation in total variance beyond the quoted wings
+        k = np.clip(np.asarray(logMoneyness, dtype=float), x[0], x[-1])
+        i = np.clip(np.searchsorted(x, k) - 1, 0, len(x) - 2)
+        h = x[i + 1] - x[i]
+        a = (x[i + 1] - k) / h
+        b = (k - x[i]) / h
+        w = a * y[i] + b * y[i + 1] + ((a**3 - a) * M[i] + (b**3 - b) * M[i + 1]) * h**2 / 6
+        return np.maximum(w, 0.0)
+
+# === Volatility Surface ===
+class VolatilitySurface:
+    def __init__(self, ticker: str, riskFreeRate: float = 0.05, minPoints: int = 3):
+        self.ticker = ticker
+        self.riskFreeRate = riskFreeRate
+        self.minPoints = minPoints
+        self.slices = {}
+
+    @staticmethod
+    def chainFingerprint(chain, S: float) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for column in (chain.strikePrice, chain.timeToMaturity, chain.callPrice, chain.putPrice):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        digest.update(np.float64(S).tobytes())
+        return digest.hexdigest()
+
+    def build(self, chains, spotPrices: dict | float, complete: bool = True) -> list:
+        if isinstance(chains, dict):
+            chains = list(chains.values())
+        chains = [c for c in chains if c.ticker == self.ticker and len(c)]
+        S = spotPrices.get(self.ticker) if isinstance(spotPrices, dict) else spotPrices
+        if S is None:
+            return []
+
+        # A complete rebuild also drops expirations that are no longer listed
+        if complete:
+            listed = {c.expiration for c in chains}
+            for expiration in [e for e in self.slices if e not in listed]:
+                del self.slices[expiration]
+
+        # Only slices whose quotes or spot moved since the last build are re-solved
+        changed = []
+        for chain in chains:
+            fingerprint = self.chainFingerprint(chain, S)
+            current = self.slices.get(chain.expiration)
+            if current is None or current.fingerprint != fingerprint:
+                changed.append((chain, fingerprint))
+        if not changed:
+            return []
+
+        # Screening looks across expirations (calendar bounds), so it sees every listed chain
+        screenChains(chains)
+
+        strikePrice = np.concatenate([c.strikePrice for c, _ in changed])
+        timeToMaturity = np.concatenate([c.timeToMaturity for c, _ in changed])
+        callPrice = np.concatenate([c.callPrice for c, _ in changed])
+        putPrice = np.concatenate([c.putPrice for c, _ in changed])
+        callExcluded, putExcluded = (np.concatenate(side) for side in zip(*(c.excluded() for c, _ in changed)))
+
+        # Out-of-the-money side of each strike carries the cleaner volatility signal
+        forward = S * np.exp(self.riskFreeRate * timeToMaturity)
+        isCall = strikePrice >= forward
+        marketPrice = np.where(isCall, np.where(callExcluded, np.nan, callPrice), np.where(putExcluded, np.nan, putPrice))
+        result = impliedVolatilityChain(
+            marketPrice, S, strikePrice, timeToMaturity, self.riskFreeRate, isCall
+        )
+        sigma, status = np.asarray(result.sigma), np.asarray(result.status)
+
+        start = 0
+        for chain, fingerprint in changed:
+            rows = slice(start, start + len(chain))
+            start += len(chain)
+            solved = status[rows] == IV_CONVERGED
+            if solved.sum() < self.minPoints:
+                self.slices.pop(chain.expiration, None)
+                continue
+            T = float(chain.timeToMaturity[0])
+            self.slices[chain.expiration] = VolatilitySlice(
+                chain.expiration,
+                T,
+                np.log(strikePrice[rows][solved] / forward[rows][solved]),
+                sigma[rows][solved]**2 * T,
+                fingerprint
+            )
+        return [chain.expiration for chain, _ in changed]
+
+    def updateSlice(self, chain, S: float) -> bool:
+        return bool(self.build([chain], S, complete=False))
+
+    def loadSolved(self, chains, S: float) -> list:
+        # Slices straight from chains whose IVs are already solved (e.g. read back from the
+        # snapshot store), on the same out-of-the-money side build() would solve. Fingerprints
+        # match build(), so a later build over unchanged quotes skips these slices.
+        if isinstance(chains, dict):
+            chains = list(chains.values())
+        loaded = []
+        for chain in chains:
+            if chain.ticker != self.ticker or not len(chain):
+                continue
+            forward = S * np.exp(self.riskFreeRate * chain.timeToMaturity)
+            isCall = chain.strikePrice >= forward
+            sigma = np.where(isCall, chain.volatilityCallValue, chain.volatilityPutValue)
+            solved = np.where(isCall, chain.volatilityCallStatus, chain.volatilityPutStatus) == IV_CONVERGED
+            if solved.sum() < self.minPoints:
+                continue
+            T = float(chain.timeToMaturity[0])
+            self.slices[chain.expiration] = VolatilitySlice(
+                chain.expiration,
+                T,
+                np.log(chain.strikePrice[solved] / forward[solved]),
+                sigma[solved]**2 * T,
+                self.chainFingerprint(chain, S)
+            )
+            loaded.append(chain.expiration)
+        return loaded
+
+    def totalVariance(self, logMoneyness, timeToMaturity) -> np.ndarray:
+        logMoneyness, timeToMaturity = np.broadcast_arrays(
+            np.asarray(logMoneyness, dtype=float), np.asarray(timeToMaturity, dtype=float)
+        )
+        slices = sorted(self.slices.values(), key=lambda s: s.timeToMaturity)
+        if not slices:
+            return np.full(logMoneyness.shape, np.nan)
+
+        maturities = np.array([s.timeToMaturity for s in slices])
+        sliceVariance = np.stack([s.totalVarianceAt(logMoneyness) for s in slices])
+
+        # Linear in total variance between slices, constant volatility outside them
+        upper = np.minimum(np.searchsorted(maturities, timeToMaturity), len(slices) - 1)
+        lower = np.maximum(upper - 1, 0)
+        lowerVariance = np.take_along_axis(sliceVariance, lower[np.newaxis], 0)[0]
+        upperVariance = np.take_along_axis(sliceVariance, upper[np.newaxis], 0)[0]
+        span = maturities[upper] - maturities[lower]
+        weight = np.where(span > 0, (timeToMaturity - maturities[lower]) / np.where(span > 0, span, 1.0), 0.0)
+        interpolated = lowerVariance + np.clip(weight, 0.0, 1.0) * (upperVariance - lowerVariance)
+
+        before = timeToMaturity < maturities[0]
+        after = timeToMaturity > maturities[-1]
+        interpolated = np.where(before, sliceVariance[0] * timeToMaturity / maturities[0], interpolated)
+        interpolated = np.where(after, sliceVariance[-1] * timeToMaturity / maturities[-1], interpolated)
+        return interpolated
+
+    def impliedVolatility(self, logMoneyness, timeToMaturity) -> np.ndarray:
+        T = np.asarray(timeToMaturity, dtype=float)
+        w = self.totalVariance(logMoneyness, T)
+        return np.sqrt(w / np.where(T > 0, T, np.nan))
+
+    def grid(self, moneyness: np.ndarray, maturities: np.ndarray) -> np.ndarray:
+        # (moneyness x T) grid of implied volatility; moneyness is K / F
+        logMoneyness = np.log(np.asarray(moneyness, dtype=float))[:, np.newaxis]
+        return self.impliedVolatility(logMoneyness, np.asarray(maturities, dtype=float)[np.newaxis, :])
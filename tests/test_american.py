@@ -0,0 +1,51 @@
+import numpy as np
+from american import americanChain, binomialChain, exerciseValue, impliedVolatilityAmerican
+from chain import OptionChain
+from metrics import metrics
+from pricing import IV_CONVERGED, IV_LOW_VEGA, blackScholesChain
+
+strikes = np.arange(80.0, 161.0, 5.0)
+
+def test_round_trip_against_lattice_prices():
+    # Deep in-the-money puts are the case early exercise matters for
+    quotes = np.stack([binomialChain(100.0, strikes, 0.5, 0.05, 0.3, True),
+                       binomialChain(100.0, strikes, 0.5, 0.05, 0.3, False)])
+    isCall = np.array([[True], [False]])
+    before = metrics.snapshot()["counters"].get("iv.contracts", 0)
+    result = impliedVolatilityAmerican(quotes, 100.0, strikes, 0.5, 0.05, isCall)
+    assert metrics.snapshot()["counters"]["iv.contracts"] - before == quotes.size
+
+    atExercise = quotes <= exerciseValue(100.0, strikes, isCall) + 0.001
+    assert np.all(result.status[atExercise] == IV_LOW_VEGA) and np.all(np.isnan(result.sigma[atExercise]))
+    assert np.all(result.status[~atExercise] == IV_CONVERGED)
+    assert np.max(np.abs(result.sigma[~atExercise] - 0.3)) < 5e-3
+
+    # The reported status is checked against the American residual itself
+    repriced = americanChain(100.0, strikes, 0.5, 0.05, result.sigma, isCall)
+    assert np.max(np.abs(repriced - quotes)[~atExercise]) < 1e-3
+
+def test_lattice_is_finite_at_low_vol_far_from_the_money():
+    S = np.exp(np.linspace(-2.0, 2.0, 9))
+    price = binomialChain(S, 1.0, 0.3, 0.05, 0.01, True)
+    np.testing.assert_allclose(price, blackScholesChain(S, 1.0, 0.3, 0.05, 0.01, True), atol=1e-4)
+
+def test_american_chain_round_trip():
+    # Through the chain, so the screen sees the same American quotes the solver does
+    K = np.arange(70.0, 151.0, 2.5)
+    call, put = binomialChain(100.0, K, 0.5, 0.05, 0.3, True), binomialChain(100.0, K, 0.5, 0.05, 0.3, False)
+    chain = OptionChain("TEST", "2030-01-18", K, 0.5, call - 0.05, call + 0.05, call, put, np.nan, 0.05, put - 0.05, put + 0.05)
+    chain.exerciseStyle = "american"
+    chain.solveImpliedVolatility(100.0)
+
+    for quotes, sigma, status, isCall in ((call, chain.volatilityCallValue, chain.volatilityCallStatus, True),
+                                          (put, chain.volatilityPutValue, chain.volatilityPutStatus, False)):
+        atExercise = quotes <= exerciseValue(100.0, K, isCall) + 0.001
+        assert np.all(status[~atExercise] == IV_CONVERGED) and np.all(status[atExercise] == IV_LOW_VEGA)
+        assert np.max(np.abs(sigma[~atExercise] - 0.3)) < 5e-3
+
+def test_cached_price_rises_smoothly_with_maturity():
+    # Day by day across several time buckets: an American put is never worth less with more time
+    T = np.arange(30, 61) / 365
+    price = americanChain(100.0, 110.0, T, 0.05, 0.3, False)
+    assert np.all(np.diff(price) >= 0)
+    np.testing.assert_allclose(price, binomialChain(100.0, 110.0, T, 0.05, 0.3, False), atol=5e-3)
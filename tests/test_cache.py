@@ -0,0 +1,75 @@
+import threading
+import time
+import pytest
+import cache
+from cache import SharedCache
+from metrics import metrics
+
+def coalescedCount() -> int:
+    return metrics.snapshot()["counters"].get("cache.coalesced", 0)
+
+def runConcurrently(sharedCache: SharedCache, compute, callers: int = 10) -> list:
+    # Every caller misses on the same key; compute is held open until the others are waiting on it
+    release, results = threading.Event(), [None] * callers
+    before = coalescedCount()
+
+    def heldCompute():
+        release.wait(5.0)
+        return compute()
+
+    def call(i):
+        try:
+            results[i] = sharedCache.getOrCompute(("chain", "XYZ"), heldCompute)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5.0
+    while coalescedCount() - before < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5.0)
+    return results
+
+def test_concurrent_misses_compute_once():
+    sharedCache, calls = SharedCache(), []
+    results = runConcurrently(sharedCache, lambda: calls.append(1) or "chain")
+    assert len(calls) == 1 and results == ["chain"] * 10
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: "recomputed") == "chain"
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    sharedCache = SharedCache()
+
+    def failing():
+        raise ConnectionError("broker down")
+
+    results = runConcurrently(sharedCache, failing)
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert not sharedCache.pending and len(sharedCache) == 0
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: "chain") == "chain"
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    sharedCache = SharedCache(ttl=300.0)
+    sharedCache.getOrCompute(("chain", "XYZ"), lambda: "first")
+    clock[0] += 299.0
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: "second") == "first"
+    clock[0] += 1.0
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: "second") == "second"
+
+def test_least_recently_used_entry_is_evicted():
+    sharedCache = SharedCache(maxEntries=2)
+    sharedCache.getOrCompute(("chain", "AAA"), lambda: "a")
+    sharedCache.getOrCompute(("chain", "BBB"), lambda: "b")
+    sharedCache.getOrCompute(("chain", "AAA"), lambda: pytest.fail("AAA was cached"))
+    sharedCache.getOrCompute(("chain", "CCC"), lambda: "c")
+    assert list(sharedCache.entries) == [("chain", "AAA"), ("chain", "CCC")]
+
+def test_empty_results_are_not_kept():
+    sharedCache = SharedCache()
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: None) is None
+    assert sharedCache.getOrCompute(("chain", "XYZ"), lambda: "chain") == "chain"
@@ -0,0 +1,31 @@
+import pytest
+import fetch
+from providers import MarketDataProvider, RobinhoodProvider, setProvider
+
+class OptionsStandIn:
+    def get_chains(self, ticker):
+        return {'expiration_dates': ['2030-01-18']}
+
+    def find_options_by_expiration(self, ticker, expirationDate, optionType):
+        return [{'strike_price': '100.0', 'mark_price': '5.0', 'bid_price': '4.9', 'ask_price': '5.1',
+                 'implied_volatility': '0.25'}]
+
+class StocksStandIn:
+    def get_latest_price(self, tickers, includeExtendedHours=False):
+        return ['100.0'] * len(tickers) if isinstance(tickers, list) else ['100.0']
+
+def test_stand_in_clients_fetch_offline():
+    provider = RobinhoodProvider(OptionsStandIn(), StocksStandIn())
+    setProvider(provider)
+    chains = fetch.fetchOptionChains(['XYZ'], maxWorkers=4, provider=provider)
+    chain = chains[('XYZ', '2030-01-18')]
+    assert list(chain.strikePrice) == [100.0] and chain.callPrice[0] == 5.0
+    assert fetch.sessionPoolSize == 0
+
+def test_incomplete_provider_fails_at_construction():
+    class QuotesOnly(MarketDataProvider):
+        def getOptionQuotes(self, ticker, expirationDate, optionType):
+            return []
+
+    with pytest.raises(TypeError):
+        QuotesOnly()
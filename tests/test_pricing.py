@@ -0,0 +1,49 @@
+import numpy as np
+from pricing import (IV_CONVERGED, IV_LOW_VEGA, aggregateGreeks, blackScholesChain, blackScholesGreeksChain,
+                     impliedVolatilityChain)
+
+def test_nan_sigma_has_no_price():
+    price = blackScholesChain(100.0, [90.0, 110.0], 0.5, 0.05, np.nan, [True, False])
+    assert np.all(np.isnan(price))
+
+def test_expired_and_zero_vol_are_intrinsic():
+    discountedStrike = 90.0 * np.exp(-0.05 * 0.5)
+    price = blackScholesChain(100.0, 90.0, [0.0, 0.5], 0.05, [np.nan, 0.0], True)
+    np.testing.assert_allclose(price, [10.0, 100.0 - discountedStrike], rtol=1e-5)
+
+def test_converged_volatilities_round_trip():
+    rng = np.random.default_rng(0)
+    K, T, sigma = rng.uniform(50, 150, 2000), rng.uniform(0.02, 1.0, 2000), rng.uniform(0.05, 1.0, 2000)
+    isCall = rng.random(2000) < 0.5
+    price = blackScholesChain(100.0, K, T, 0.05, sigma, isCall)
+    result = impliedVolatilityChain(price, 100.0, K, T, 0.05, isCall)
+    converged = result.status == IV_CONVERGED
+    assert converged.mean() > 0.85
+    assert np.all(np.isin(result.status, [IV_CONVERGED, IV_LOW_VEGA]))
+    assert np.max(np.abs(result.sigma - sigma)[converged]) < 2e-3
+
+def test_quotes_without_time_value_are_low_vega():
+    # Far out-of-the-money and deep in-the-money, both worth (almost) exactly their bound
+    K = np.array([160.0, 40.0])
+    price = blackScholesChain(100.0, K, 0.05, 0.05, 0.065, True)
+    result = impliedVolatilityChain(price, 100.0, K, 0.05, 0.05, True)
+    assert np.all(result.status == IV_LOW_VEGA)
+
+def test_seed_does_not_change_accuracy():
+    rng = np.random.default_rng(1)
+    K, T = rng.uniform(50, 150, 2000), rng.choice(np.array([7, 30, 90, 365]) / 365, 2000)
+    sigma = 0.2 + 0.25 * np.log(K / 100.0)**2 / np.sqrt(T)
+    isCall = rng.random(2000) < 0.5
+    price = blackScholesChain(100.0, K, T, 0.05, sigma, isCall)
+    for guess in (None, np.full(2000, 0.5)):
+        result = impliedVolatilityChain(price, 100.0, K, T, 0.05, isCall, guess)
+        converged = result.status == IV_CONVERGED
+        assert np.max(np.abs(result.sigma - sigma)[converged]) < 2e-3
+
+def test_nan_sigma_has_no_greeks():
+    greeks = blackScholesGreeksChain(100.0, 100.0, [0.5, 0.5, 0.0], 0.05, [np.nan, 0.2, np.nan], True)
+    for value in greeks:
+        assert np.isnan(value[0]) and np.isfinite(value[1]) and np.isfinite(value[2])
+    assert greeks.delta[2] == 0.0
+    totals = aggregateGreeks(greeks, [1.0, 1.0, 1.0])
+    assert totals["delta"] == greeks.delta[1] * 100.0
@@ -0,0 +1,23 @@
+import numpy as np
+from chain import OptionChain
+from pricing import blackScholesChain
+from scanner import scanChains
+
+def quotedChain(strikes, sigma, T=0.25):
+    K = np.asarray(strikes, dtype=float)
+    call = np.round(blackScholesChain(100.0, K, T, 0.05, sigma, True), 2)
+    put = np.round(blackScholesChain(100.0, K, T, 0.05, sigma, False), 2)
+    return OptionChain("XYZ", "2030-01-18", K, T, call - 0.05, call + 0.05, call, put, sigma,
+                       putBidPrice=put - 0.05, putAskPrice=put + 0.05)
+
+def test_chain_too_thin_for_a_smile_is_not_ranked():
+    assert len(scanChains([quotedChain([95.0, 105.0], 0.3)], 100.0)) == 0
+
+def test_mispriced_contract_ranks_first():
+    chain = quotedChain(np.arange(80.0, 121.0, 5.0), 0.3)
+    chain.callPrice[6] += 1.0
+    chain.bidPrice[6] += 1.0
+    chain.askPrice[6] += 1.0
+    result = scanChains([chain], 100.0)
+    assert result.iloc[0].strikePrice == 110.0 and result.iloc[0].side == "sell"
+    assert np.all(np.isfinite(result.modelVolatility))
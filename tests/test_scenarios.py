@@ -0,0 +1,48 @@
+from datetime import datetime
+import itertools
+import numpy as np
+import pandas as pd
+from pricing import blackScholesChain
+from scenarios import Portfolio, portfolioFromFrame, runScenarios
+
+asOf = datetime(2030, 1, 2)
+
+def test_rows_without_iv_are_solved_from_their_mark():
+    mark = float(blackScholesChain(100.0, 105.0, 182 / 365, 0.05, 0.3, True))
+    frame = pd.DataFrame({
+        "ticker": ["XYZ", "XYZ", "XYZ"],
+        "expiration": ["2030-07-03"] * 3,
+        "optionType": ["call", "call", "put"],
+        "strike_price": [95.0, 105.0, 100.0],
+        "quantity": [1, 2, -1],
+        "sharePrice": [100.0] * 3,
+        "implied_volatility": [0.25, None, None],
+        "mark_price": [None, mark, None]
+    })
+    portfolio = portfolioFromFrame(frame, asOf)
+    assert portfolio.sigma[0] == 0.25
+    assert abs(portfolio.sigma[1] - 0.3) < 2e-3
+    assert np.isnan(portfolio.sigma[2])
+
+def test_chunked_scenarios_match_naive_revaluation():
+    rng = np.random.default_rng(0)
+    n = 40
+    portfolio = Portfolio(("AAA", "BBB"), np.array([100.0, 50.0]), rng.integers(0, 2, n), rng.uniform(40, 120, n),
+                          rng.uniform(0.02, 1.0, n), rng.random(n) < 0.5, rng.integers(-5, 6, n).astype(float),
+                          rng.uniform(0.15, 0.6, n))
+    portfolio.sigma[3] = np.nan
+    spotShocks, volShocks, days = np.array([-0.1, 0.0, 0.1]), np.array([-0.05, 0.05]), np.array([0.0, 7.0])
+    # Fewer elements than one scenario's positions, so every chunk is a single scenario
+    result = runScenarios(portfolio, spotShocks, volShocks, days, maxElements=16)
+    assert result.excludedPositions == 1 and result.pnl.shape == (3, 2, 2)
+
+    priced = np.isfinite(portfolio.sigma)
+    S, K, T = portfolio.sharePrice[portfolio.underlying][priced], portfolio.strikePrice[priced], portfolio.timeToMaturity[priced]
+    sigma, isCall, weight = portfolio.sigma[priced], portfolio.isCall[priced], portfolio.quantity[priced] * 100.0
+    base = blackScholesChain(S, K, T, 0.05, sigma, isCall)
+    for (i, spot), (j, vol), (k, day) in itertools.product(enumerate(spotShocks), enumerate(volShocks), enumerate(days)):
+        value = blackScholesChain(S * (1 + spot), K, np.maximum(T - day / 365, 0.0), 0.05, np.maximum(sigma + vol, 1e-4), isCall)
+        pnl = (value - base) * weight
+        byUnderlying = [pnl[portfolio.underlying[priced] == u].sum() for u in range(2)]
+        np.testing.assert_allclose(result.pnlByUnderlying[:, i, j, k], byUnderlying, atol=0.05)
+        assert abs(result.pnl[i, j, k] - pnl.sum()) < 0.05
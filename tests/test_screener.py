@@ -0,0 +1,25 @@
+import numpy as np
+from american import binomialChain
+from chain import OptionChain
+from screener import FLAG_PARITY
+
+def latticeChain(strikes, T=0.3, sigma=0.35, halfSpread=0.05) -> OptionChain:
+    # Arbitrage-free American quotes, cent-rounded, with a two-sided market around each mark
+    call = np.round(binomialChain(100.0, strikes, T, 0.05, sigma, True), 2)
+    put = np.round(binomialChain(100.0, strikes, T, 0.05, sigma, False), 2)
+    return OptionChain("TEST", "2030-01-18", strikes, T, call - halfSpread, call + halfSpread, call, put, np.nan,
+                       0.05, put - halfSpread, put + halfSpread)
+
+def test_american_quotes_pass_the_screen():
+    chain = latticeChain(np.arange(70.0, 151.0, 1.0))
+    chain.screen()
+    assert not np.any(chain.callFlags) and not np.any(chain.putFlags)
+
+def test_parity_outlier_is_flagged():
+    chain = latticeChain(np.arange(70.0, 151.0, 1.0))
+    row = chain.strikeIndex(100.0)
+    for bump in (2.0, -2.0):
+        shifted = chain.copy()
+        shifted.callPrice[row] += bump
+        shifted.screen()
+        assert np.flatnonzero(shifted.callFlags & FLAG_PARITY).tolist() == [row]
@@ -0,0 +1,42 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from chain import OptionChain
+from snapshots import SnapshotStore
+
+def quotedChain(expiration="2030-01-18"):
+    K = np.arange(80.0, 121.0, 5.0)
+    return OptionChain("XYZ", expiration, K, 0.25, K * 0 + 1.0, K * 0 + 1.2, K * 0 + 1.1, K * 0 + 0.9, 0.3,
+                       putBidPrice=K * 0 + 0.8, putAskPrice=K * 0 + 1.0)
+
+def test_same_snapshot_appended_twice_loads_once(tmp_path):
+    store = SnapshotStore(tmp_path, retentionDays=None)
+    asOf = datetime(2030, 1, 2, 15, 30)
+    store.append(quotedChain(), asOf, greeks=False)
+    store.append(quotedChain(), asOf, greeks=False)
+    chain = store.loadChains("XYZ", asOf)[("XYZ", "2030-01-18")]
+    assert len(chain) == 9 and np.all(np.diff(chain.strikePrice) > 0)
+
+def test_latest_snapshot_of_each_expiration(tmp_path):
+    store = SnapshotStore(tmp_path, retentionDays=None)
+    earlier, later = datetime(2030, 1, 2, 15, 30), datetime(2030, 1, 2, 15, 31)
+    store.append([quotedChain("2030-01-18"), quotedChain("2030-02-15")], earlier, greeks=False)
+    moved = quotedChain("2030-01-18")
+    moved.callPrice[:] = 1.15
+    store.append(moved, later, greeks=False)
+
+    chains = store.loadChains("XYZ")
+    assert np.all(chains[("XYZ", "2030-01-18")].callPrice == 1.15)
+    assert np.all(chains[("XYZ", "2030-02-15")].callPrice == 1.1)
+    assert np.all(store.loadChains("XYZ", earlier)[("XYZ", "2030-01-18")].callPrice == 1.1)
+    assert list(store.loadChains("XYZ", expirations=["2030-02-15"])) == [("XYZ", "2030-02-15")]
+    assert store.loadChains("XYZ", expirations=["2031-01-17"]) == {}
+
+def test_compaction_and_retention(tmp_path):
+    store = SnapshotStore(tmp_path, retentionDays=30)
+    store.maintainedOn = date.today()  # no background maintenance racing the explicit calls
+    today = datetime.now()
+    for days in (1, 1, 40):
+        store.append(quotedChain(), today - timedelta(days=days), greeks=False)
+    assert store.prune() == 1
+    assert store.compact("XYZ") == 2
+    assert len(store.read("XYZ")) == 9
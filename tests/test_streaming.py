@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import providers
+from chain import OptionChain
+from pricing import IV_CONVERGED, IV_SCREENED, blackScholesChain
+from providers import MarketDataProvider, ReplayProvider
+from streaming import ChainStreamer
+
+strikes = np.arange(80.0, 121.0, 5.0)
+
+def quotedChain(K=strikes, S=100.0) -> OptionChain:
+    call, put = blackScholesChain(S, K, 0.25, 0.05, 0.3, True), blackScholesChain(S, K, 0.25, 0.05, 0.3, False)
+    return OptionChain("XYZ", "2030-01-18", K, 0.25, call - 0.05, call + 0.05, call, put, np.nan, 0.05,
+                       put - 0.05, put + 0.05)
+
+def solvedChain() -> OptionChain:
+    chain = quotedChain()
+    chain.solveImpliedVolatility(100.0)
+    assert np.all(chain.volatilityCallStatus == IV_CONVERGED) and np.all(chain.volatilityPutStatus == IV_CONVERGED)
+    return chain
+
+def test_unchanged_quotes_resolve_nothing():
+    chain = solvedChain()
+    assert chain.update(quotedChain(), 100.0) == 0
+
+def test_only_the_moved_quote_is_resolved():
+    chain = solvedChain()
+    before = chain.volatilityCallValue.copy()
+    latest = quotedChain()
+    latest.callPrice[4] += 0.02
+    assert chain.update(latest, 100.0) == 1
+    assert chain.volatilityCallValue[4] > before[4]
+    assert np.array_equal(np.delete(chain.volatilityCallValue, 4), np.delete(before, 4))
+
+def test_spot_move_resolves_every_row():
+    chain = solvedChain()
+    assert chain.update(quotedChain(), 101.0) == 2 * len(chain)
+
+def test_listed_and_delisted_strikes_carry_over_by_strike():
+    chain = solvedChain()
+    before = dict(zip(chain.strikePrice, chain.volatilityPutValue))
+    assert chain.update(quotedChain(np.arange(85.0, 126.0, 5.0)), 100.0) == 2
+    assert list(chain.strikePrice) == list(np.arange(85.0, 126.0, 5.0))
+    assert all(chain.volatilityPutValue[i] == before[k] for i, k in enumerate(chain.strikePrice) if k in before)
+    assert chain.volatilityPutStatus[-1] == IV_CONVERGED
+
+def test_rows_whose_screening_changed_are_resolved():
+    chain = solvedChain()
+    latest = quotedChain()
+    latest.callPrice[4] += 3.0
+    resolved = chain.update(latest, 100.0)
+    callExcluded, putExcluded = chain.excluded()
+    # The bumped call drags its neighbours into the screen too, and each of them is re-solved
+    assert callExcluded.sum() > 1 and resolved == callExcluded.sum() + putExcluded.sum()
+    assert np.all(chain.volatilityCallStatus[callExcluded] == IV_SCREENED)
+
+    assert chain.update(quotedChain(), 100.0) == resolved
+    assert np.all(chain.volatilityCallStatus == IV_CONVERGED) and np.all(chain.volatilityPutStatus == IV_CONVERGED)
+
+def test_pushed_quotes_resolve_their_rows():
+    chain = solvedChain()
+    quote = {'strike_price': '100.0', 'optionType': 'put', 'mark_price': str(chain.putPrice[4] + 0.02)}
+    assert chain.applyQuotes([quote, dict(quote, strike_price='101.0')], 100.0) == 1
+
+class FixedSpotProvider(MarketDataProvider):
+    def getExpirations(self, ticker):
+        return []
+
+    def getOptionQuotes(self, ticker, expirationDate, optionType):
+        return []
+
+    def getSharePrice(self, ticker):
+        return 250.0
+
+def test_streamer_prices_against_its_own_provider(tmp_path, monkeypatch):
+    chain = quotedChain()
+    path = tmp_path / "replay.jsonl"
+    with open(path, "w") as f:
+        for optionType, prices in (('call', chain.callPrice), ('put', chain.putPrice)):
+            for strike, price in zip(chain.strikePrice, prices):
+                f.write(json.dumps({"snapshotTime": "2029-10-19T15:30:00", "ticker": "XYZ", "expiration": "2030-01-18",
+                                    "optionType": optionType, "strike_price": str(strike), "mark_price": str(price),
+                                    "bid_price": str(price - 0.05), "ask_price": str(price + 0.05),
+                                    "implied_volatility": None, "sharePrice": 100.0}) + "\n")
+    monkeypatch.setattr(providers, "activeProvider", FixedSpotProvider())
+
+    streamer = ChainStreamer("XYZ", "2030-01-18", provider=ReplayProvider(str(path)))
+    streamer.poll()
+    assert streamer.chain.sharePrice == 100.0
+    assert np.all(streamer.chain.volatilityCallStatus == IV_CONVERGED)